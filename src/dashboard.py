@@ -1,13 +1,26 @@
 import dash
 from dash import dcc, html
-from dash.dependencies import Input, Output
+from dash.dependencies import Input, Output, State
 import pandas as pd
+import numpy as np
 import os
-import plotly.graph_objs as go
-import plotly.express as px
-from datetime import datetime, timedelta
+import io
+import hashlib
+import plotly.io as pio
+from datetime import datetime, timedelta, time
+from zoneinfo import ZoneInfo
 import logging
 
+try:
+    import orjson
+except ImportError:  # optional: falls back to plotly's stdlib json engine
+    orjson = None
+
+try:
+    import pyarrow
+except ImportError:  # optional: falls back to the C CSV parser
+    pyarrow = None
+
 # Configure logging
 logging.basicConfig(
     filename='logs/dashboard.log',
@@ -15,6 +28,53 @@ logging.basicConfig(
     format='%(asctime)s - %(levelname)s - %(message)s'
 )
 
+# Serialize figures and component trees with orjson when it's available
+if orjson is not None:
+    pio.json.config.default_engine = 'orjson'
+
+# Trade history CSV parsing: the multithreaded pyarrow reader when available,
+# with explicit dtypes so no inference pass runs
+_CSV_ENGINE = 'pyarrow' if pyarrow is not None else 'c'
+_STR_DTYPE = 'string[pyarrow]' if pyarrow is not None else 'string'
+TRADE_DTYPES = {
+    'symbol': _STR_DTYPE, 'entry_time': _STR_DTYPE, 'exit_time': _STR_DTYPE,
+    'status': 'category', 'exit_reason': 'category',
+    'entry_price': 'float64', 'exit_price': 'float64', 'pnl': 'float64',
+    'paper_trade': 'boolean',
+}
+
+# Parsed trade history, reused until the CSV's (mtime, size) changes. 'size' is
+# the byte offset parsed up to (always a row boundary), 'header' the raw header
+# line and 'prefix' a SHA1 of the file's leading bytes, so appended rows can be
+# parsed on their own instead of re-reading the whole file. 'derived' holds the
+# P&L chart arrays built from 'df' and is dropped whenever the frame changes
+_trade_cache = {'key': None, 'df': None, 'size': 0, 'header': b'', 'prefix': None, 'prefix_len': 0,
+                'derived': None}
+
+# Leading bytes hashed to detect a rewritten (rather than appended) CSV
+_PREFIX_BYTES = 4096
+
+# Poll every 30 seconds while the market is open (09:15-15:30 IST, Mon-Fri)
+# and every 5 minutes otherwise, when the trade history can't change
+_IST = ZoneInfo("Asia/Kolkata")
+MARKET_OPEN = time(9, 15)
+MARKET_CLOSE = time(15, 30)
+MARKET_POLL_MS = 30_000
+IDLE_POLL_MS = 300_000
+
+def _poll_interval():
+    """Refresh interval in ms for the current IST time"""
+    now = datetime.now(_IST)
+    in_market = now.weekday() < 5 and MARKET_OPEN <= now.time() <= MARKET_CLOSE
+    return MARKET_POLL_MS if in_market else IDLE_POLL_MS
+
+def _mtime(path):
+    """Modification time of path, or None if it doesn't exist"""
+    try:
+        return os.path.getmtime(path)
+    except FileNotFoundError:
+        return None
+
 # Initialize the Dash app
 app = dash.Dash(__name__)
 
@@ -46,19 +106,34 @@ app.layout = html.Div([
     
     dcc.Interval(
         id='interval-component',
-        interval=30*1000,  # Update every 30 seconds
+        interval=MARKET_POLL_MS,  # Retuned by update_dashboard to the market hours
         n_intervals=0
-    )
+    ),
+    
+    # [trade CSV mtime, config mtime, date, poll interval] this browser tab last rendered
+    dcc.Store(id='render-sig')
 ])
 
 @app.callback(
     [Output('strategy-settings', 'children'),
      Output('todays-stats', 'children'),
      Output('pnl-chart', 'figure'),
-     Output('trade-table', 'children')],
-    [Input('interval-component', 'n_intervals')]
+     Output('trade-table', 'children'),
+     Output('interval-component', 'interval'),
+     Output('render-sig', 'data')],
+    [Input('interval-component', 'n_intervals')],
+    [State('render-sig', 'data')]
 )
-def update_dashboard(n):
+def update_dashboard(n, last_sig):
+    # Nothing changed since this tab's last render: let Dash skip serialization and
+    # the DOM diff. The signature lives in the tab's own dcc.Store, so every open
+    # tab picks up changes independently, and a fresh page load always renders.
+    # A new poll interval (market open/close) also counts as a change.
+    interval = _poll_interval()
+    sig = [_mtime('logs/trade_history.csv'), _mtime('config/config.yaml'), datetime.now().date().isoformat(), interval]
+    if n and sig == last_sig:
+        return (dash.no_update,) * 6
+    
     # Load strategy settings
     strategy_settings = load_strategy_settings()
     
@@ -74,7 +149,7 @@ def update_dashboard(n):
     # Create trade table
     trade_table = create_trade_table(trade_data)
     
-    return strategy_settings, today_stats, pnl_chart, trade_table
+    return strategy_settings, today_stats, pnl_chart, trade_table, interval, sig
 
 def load_strategy_settings():
     try:
@@ -86,7 +161,8 @@ def load_strategy_settings():
             
         # For a simple display, we'll just show the last modified time
         mod_time = datetime.fromtimestamp(os.path.getmtime(config_path))
-          return html.Div([
+        
+        return html.Div([
             html.P(f"Config Last Updated: {mod_time.strftime('%Y-%m-%d %H:%M:%S')}"),
             html.P("Mode: Paper Trading (Simulated)", style={'fontWeight': 'bold'}),
             html.P("Position Size: 1 lot (fixed)"),
@@ -99,6 +175,48 @@ def load_strategy_settings():
         logging.error(f"Error loading strategy settings: {str(e)}")
         return html.Div([html.P("Error loading strategy settings.")])
 
+def _parse_trade_csv(data):
+    """
+    Parse raw trade history CSV bytes and add the derived datetime columns
+    
+    Args:
+        data: CSV bytes, header line included
+        
+    Returns:
+        DataFrame: Parsed trades
+    """
+    df = pd.read_csv(io.BytesIO(data), engine=_CSV_ENGINE, dtype=TRADE_DTYPES, parse_dates=['date'])
+    
+    if 'date' in df.columns:
+        # Day-resolution copy of the date for int64 equality filters
+        df['date_only'] = df['date'].values.astype('datetime64[D]')
+        date_str = df['date'].dt.strftime('%Y-%m-%d')
+        
+        if 'entry_time' in df.columns:
+            # Combine date and time in one vectorized parse
+            df['entry_datetime'] = pd.to_datetime(
+                date_str + ' ' + df['entry_time'].astype(str),
+                format='%Y-%m-%d %H:%M:%S', errors='coerce', cache=True
+            )
+            
+        if 'exit_time' in df.columns:
+            # Rows without an exit_time stay NaT
+            df['exit_datetime'] = pd.to_datetime(
+                (date_str + ' ' + df['exit_time'].astype(str)).where(df['exit_time'].notna()),
+                format='%Y-%m-%d %H:%M:%S', errors='coerce', cache=True
+            )
+    
+    return df
+
+def _served_frame():
+    """
+    Shallow copy of the cached trade frame, tagged with the cache key it was
+    served for so _pnl_arrays can tell it apart from filtered or rebuilt frames
+    """
+    df = _trade_cache['df'].copy(deep=False)
+    df.attrs['trade_cache_key'] = _trade_cache['key']
+    return df
+
 def load_trade_data():
     try:
         # Check if trade history CSV exists
@@ -106,30 +224,49 @@ def load_trade_data():
         
         if not os.path.exists(trade_path):
             return pd.DataFrame()
-            
-        # Load trade history from CSV
-        df = pd.read_csv(trade_path)
         
-        # Convert date/time columns to datetime
-        if 'date' in df.columns:
-            df['date'] = pd.to_datetime(df['date'])
-        
-        if 'entry_time' in df.columns and 'date' in df.columns:
-            # Combine date and time
-            df['entry_datetime'] = df.apply(
-                lambda row: pd.to_datetime(f"{row['date'].strftime('%Y-%m-%d')} {row['entry_time']}"),
-                axis=1
-            )
+        # Skip the parse when the file hasn't changed since the last interval
+        stat = os.stat(trade_path)
+        cache_key = (stat.st_mtime, stat.st_size)
+        if _trade_cache['key'] == cache_key:
+            return _served_frame()
             
-        if 'exit_time' in df.columns and 'date' in df.columns:
-            # Only process rows where exit_time is not NaN
-            df['exit_datetime'] = df.apply(
-                lambda row: pd.to_datetime(f"{row['date'].strftime('%Y-%m-%d')} {row['exit_time']}")
-                if pd.notna(row['exit_time']) else pd.NaT,
-                axis=1
-            )
+        with open(trade_path, 'rb') as f:
+            prefix = f.read(_PREFIX_BYTES)
+            cached_df = _trade_cache['df']
+            old_size = _trade_cache['size']
+            
+            if (cached_df is not None and stat.st_size > old_size
+                    and _trade_cache['prefix'] == hashlib.sha1(prefix[:_trade_cache['prefix_len']]).digest()):
+                # Rows were only appended: parse the tail against the cached header
+                f.seek(old_size)
+                tail = f.read()
+                end = tail.rfind(b'\n') + 1
+                df = cached_df
+                if end:
+                    new_df = _parse_trade_csv(_trade_cache['header'] + tail[:end])
+                    df = pd.concat([cached_df, new_df], ignore_index=True)
+                    # Re-derive categoricals whose category sets differed between chunks
+                    for col in ('status', 'exit_reason'):
+                        if col in df.columns and df[col].dtype != 'category':
+                            df[col] = df[col].astype('category')
+                parsed_size = old_size + end
+            else:
+                # First load, or the file was truncated/rewritten: full reparse
+                f.seek(0)
+                data = f.read()
+                parsed_size = data.rfind(b'\n') + 1
+                df = _parse_trade_csv(data[:parsed_size])
+                _trade_cache['header'] = data[:data.find(b'\n') + 1]
+                _trade_cache['prefix'] = hashlib.sha1(prefix).digest()
+                _trade_cache['prefix_len'] = len(prefix)
         
-        return df
+        if df is not _trade_cache['df']:
+            _trade_cache['derived'] = None
+        _trade_cache['key'] = cache_key
+        _trade_cache['df'] = df
+        _trade_cache['size'] = parsed_size
+        return _served_frame()
     except Exception as e:
         logging.error(f"Error loading trade data: {str(e)}")
         return pd.DataFrame()
@@ -143,8 +280,9 @@ def calculate_today_stats(df):
             ])
             
         # Filter for today's date
-        today = datetime.now().strftime('%Y-%m-%d')
-        today_df = df[df['date'] == today] if 'date' in df.columns else pd.DataFrame()
+        today_d = np.datetime64(datetime.now().date(), 'D')
+        today = str(today_d)
+        today_df = df[df['date_only'].values == today_d] if 'date_only' in df.columns else pd.DataFrame()
         
         if today_df.empty:
             return html.Div([
@@ -152,17 +290,21 @@ def calculate_today_stats(df):
                 html.P("Waiting for trading signals...")
             ])
             
-        # Calculate statistics
+        # Calculate statistics from two status masks over the raw arrays
+        status = today_df['status']
+        closed_mask = status.eq('CLOSED').to_numpy()
+        open_mask = status.eq('OPEN').to_numpy()
+        closed_pnl = today_df['pnl'].to_numpy()[closed_mask]
+        
         total_trades = len(today_df)
-        closed_trades = len(today_df[today_df['status'] == 'CLOSED'])
-        open_trades = len(today_df[today_df['status'] == 'OPEN'])
+        closed_trades = int(closed_mask.sum())
+        open_trades = int(open_mask.sum())
         
-        win_trades = len(today_df[(today_df['status'] == 'CLOSED') & (today_df['pnl'] > 0)])
-        loss_trades = len(today_df[(today_df['status'] == 'CLOSED') & (today_df['pnl'] <= 0)])
+        win_trades = int((closed_pnl > 0).sum())
         
         win_rate = (win_trades / closed_trades * 100) if closed_trades > 0 else 0
         
-        total_pnl = today_df[today_df['status'] == 'CLOSED']['pnl'].sum()
+        total_pnl = float(np.nansum(closed_pnl))
         
         return html.Div([
             html.P(f"Date: {today}"),
@@ -176,56 +318,82 @@ def calculate_today_stats(df):
         logging.error(f"Error calculating today's stats: {str(e)}")
         return html.Div([html.P("Error calculating statistics.")])
 
+def _empty_chart(title):
+    """Figure with no traces, used for the placeholder states"""
+    return {'data': [], 'layout': {'title': title}}
+
+def _pnl_arrays(df):
+    """
+    Closed-trade arrays for the P&L chart
+    
+    The arrays are cached alongside the trade frame, and only reused for a
+    frame load_trade_data served from that same cache entry; any other frame
+    (filtered, rebuilt) gets its own arrays.
+    
+    Args:
+        df: Trade history DataFrame
+        
+    Returns:
+        dict: 'xs', 'cum', 'pnls' and 'colors' arrays (empty when no trade is closed)
+    """
+    cached_df = _trade_cache['df']
+    from_cache = (
+        cached_df is not None
+        and df.attrs.get('trade_cache_key') == _trade_cache['key']
+        and len(df) == len(cached_df)
+    )
+    if from_cache and _trade_cache['derived'] is not None:
+        return _trade_cache['derived']
+        
+    closed = df[df['status'].eq('CLOSED')]
+    pnls = closed['pnl'].to_numpy()
+    derived = {
+        'xs': closed['entry_datetime'].to_numpy(),
+        'cum': np.nancumsum(pnls),  # a CLOSED row without pnl mustn't blank the rest of the line
+        'pnls': pnls,
+        'colors': np.where(pnls > 0, 'green', 'red'),
+    }
+    if from_cache:
+        _trade_cache['derived'] = derived
+    return derived
+
 def create_pnl_chart(df):
     try:
         if df.empty or 'pnl' not in df.columns:
-            return {
-                'data': [],
-                'layout': go.Layout(title='No trade data available')
-            }
+            return _empty_chart('No trade data available')
             
-        # Filter for completed trades
-        closed_trades = df[df['status'] == 'CLOSED'].copy()
+        # Completed trades, reused across ticks until the CSV changes
+        arrays = _pnl_arrays(df)
         
-        if closed_trades.empty:
-            return {
-                'data': [],
-                'layout': go.Layout(title='No completed trades yet')
-            }
+        if not len(arrays['pnls']):
+            return _empty_chart('No completed trades yet')
             
-        # Create a cumulative P&L series
-        closed_trades['cumulative_pnl'] = closed_trades['pnl'].cumsum()
-        
-        # Create a time series chart
-        fig = px.line(
-            closed_trades, 
-            x='entry_datetime', 
-            y='cumulative_pnl',
-            title='Cumulative P&L Over Time',
-            labels={'entry_datetime': 'Date/Time', 'cumulative_pnl': 'Cumulative P&L'}
-        )
-        
-        # Add individual trade markers
-        fig.add_trace(
-            go.Scatter(
-                x=closed_trades['entry_datetime'],
-                y=closed_trades['pnl'],
-                mode='markers',
-                marker=dict(
-                    size=10,
-                    color=closed_trades['pnl'].apply(lambda x: 'green' if x > 0 else 'red'),
-                ),
-                name='Individual Trades'
-            )
-        )
+        # Cumulative P&L line plus individual trade markers, as a plain figure
+        # dict so no graph_objs validation runs on every tick
+        xs, pnls = arrays['xs'], arrays['pnls']
         
-        return fig
-    except Exception as e:
-        logging.error(f"Error creating P&L chart: {str(e)}")
         return {
-            'data': [],
-            'layout': go.Layout(title='Error creating P&L chart')
+            'data': [
+                {'type': 'scatter', 'mode': 'lines', 'x': xs, 'y': arrays['cum'],
+                 'name': 'Cumulative P&L'},
+                {'type': 'scatter', 'mode': 'markers', 'x': xs, 'y': pnls,
+                 'marker': {'size': 10, 'color': arrays['colors']}, 'name': 'Individual Trades'},
+            ],
+            'layout': {
+                'title': 'Cumulative P&L Over Time',
+                'xaxis': {'title': 'Date/Time'},
+                'yaxis': {'title': 'Cumulative P&L'},
+            }
         }
+    except Exception as e:
+        logging.error(f"Error creating P&L chart: {str(e)}")
+        return _empty_chart('Error creating P&L chart')
+
+# Trade history columns shown in the table (missing ones are filled with NaN)
+TABLE_COLUMNS = [
+    'date', 'symbol', 'entry_time', 'entry_price', 'exit_time', 'exit_price',
+    'pnl', 'status', 'exit_reason', 'paper_trade'
+]
 
 def create_trade_table(df):
     try:
@@ -236,11 +404,23 @@ def create_trade_table(df):
         df_sorted = df.sort_values(by=['date', 'entry_time'], ascending=[False, False])
         
         # Limit to last 10 trades for display
-        recent_trades = df_sorted.head(10)
+        recent = df_sorted.head(10).reindex(columns=TABLE_COLUMNS)
+        
+        # Format every display column up front so the row loop only reads tuples
+        exit_price = recent['exit_price']
+        pnl = recent['pnl']
+        recent['entry_price_s'] = recent['entry_price'].fillna(0).map('{:.2f}'.format)
+        recent['exit_price_s'] = np.where(exit_price.notna() & (exit_price != 0), exit_price.fillna(0).map('{:.2f}'.format), '-')
+        recent['pnl_s'] = pnl.fillna(0).map('{:.2f}'.format)
+        recent['pnl_color'] = np.where(pnl > 0, 'green', np.where(pnl < 0, 'red', ''))
+        recent['paper_s'] = np.where(recent['paper_trade'].fillna(True).astype(bool), 'Yes', 'No')
+        recent[['exit_time', 'exit_reason']] = recent[['exit_time', 'exit_reason']].astype(object).fillna('-')
+        recent[['date', 'symbol', 'entry_time', 'status']] = recent[['date', 'symbol', 'entry_time', 'status']].astype(object).fillna('')
         
         # Create table rows
         table_rows = []
-          # Header row
+        
+        # Header row
         header = html.Tr([
             html.Th("Date"),
             html.Th("Symbol"),
@@ -257,24 +437,18 @@ def create_trade_table(df):
         table_rows.append(header)
         
         # Data rows
-        for _, row in recent_trades.iterrows():
-            # Format P&L and determine color
-            pnl = row.get('pnl', None)
-            pnl_style = {'color': 'green'} if pnl and pnl > 0 else {'color': 'red'} if pnl and pnl <= 0 else {}
-              # Format the row
-            paper_trade = row.get('paper_trade', True)  # Default to True for backward compatibility
-            
+        for r in recent.itertuples(index=False):
             table_row = html.Tr([
-                html.Td(row.get('date', '')),
-                html.Td(row.get('symbol', '')),
-                html.Td(row.get('entry_time', '')),
-                html.Td(f"{row.get('entry_price', 0):.2f}"),
-                html.Td(row.get('exit_time', '-')),
-                html.Td(f"{row.get('exit_price', 0):.2f}" if row.get('exit_price') else '-'),
-                html.Td(f"{row.get('pnl', 0):.2f}", style=pnl_style),
-                html.Td(row.get('status', '')),
-                html.Td(row.get('exit_reason', '-')),
-                html.Td('Yes' if paper_trade else 'No')
+                html.Td(r.date),
+                html.Td(r.symbol),
+                html.Td(r.entry_time),
+                html.Td(r.entry_price_s),
+                html.Td(r.exit_time),
+                html.Td(r.exit_price_s),
+                html.Td(r.pnl_s, style={'color': r.pnl_color} if r.pnl_color else {}),
+                html.Td(r.status),
+                html.Td(r.exit_reason),
+                html.Td(r.paper_s)
             ])
             
             table_rows.append(table_row)
@@ -1,104 +1,650 @@
 from fyers_apiv3 import fyersModel
 from fyers_apiv3.FyersWebsocket import data_ws, order_ws
 import logging
+import asyncio
+import copy
 import datetime
+import json
+import functools
+import hashlib
+import os
+import queue
+import sys
+import threading
 import time
+import types
+from concurrent.futures import ThreadPoolExecutor, wait, TimeoutError as FutureTimeoutError
+from zoneinfo import ZoneInfo
+import numpy as np
 import pandas as pd
+import aiohttp
+import requests
+from cachetools import TTLCache
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Historical data cache is disabled without pyarrow
+    pa = None
+    pq = None
+try:
+    import orjson
+except ImportError:  # Falls back to the stdlib json used by the SDK
+    orjson = None
+try:
+    from hdrh.histogram import HdrHistogram
+except ImportError:  # Latency tracking is disabled without hdrhistogram
+    HdrHistogram = None
 from src.config import load_config
 from src.token_helper import ensure_valid_token
 
-def get_fyers_client(check_token=True):
+class _OrjsonShim:
+    """json-compatible loads/dumps backed by orjson, falling back to stdlib json
+    for anything orjson cannot serialise"""
+    
+    @staticmethod
+    def loads(data, **kwargs):
+        if kwargs:
+            return json.loads(data, **kwargs)
+        return orjson.loads(data)
+    
+    @staticmethod
+    def dumps(obj, **kwargs):
+        if kwargs:
+            return json.dumps(obj, **kwargs)
+        try:
+            return orjson.dumps(obj).decode()
+        except TypeError:
+            return json.dumps(obj)
+    
+    def __getattr__(self, name):
+        return getattr(json, name)
+
+# The SDK encodes request payloads (and re-parses response bodies for its debug
+# log) through its module-level `json`; route those through orjson when it is
+# installed. Async responses are still decoded by aiohttp's response.json(),
+# which uses the stdlib json module.
+if orjson is not None and getattr(fyersModel, "json", None) is json:
+    fyersModel.json = _OrjsonShim()
+
+# Per-call latency histograms (nanoseconds), keyed by API call name
+_LATENCY = {}
+_LATENCY_LOCK = threading.Lock()
+
+def _record_latency(name, start):
+    """Record the nanoseconds elapsed since `start` in the histogram for `name`"""
+    elapsed = time.perf_counter_ns() - start
+    with _LATENCY_LOCK:
+        histogram = _LATENCY.get(name)
+        if histogram is None:
+            histogram = _LATENCY[name] = HdrHistogram(1, 60_000_000_000, 3)
+        histogram.record_value(min(max(elapsed, 1), 60_000_000_000))
+
+def _timed(name):
+    """Decorator recording the wall-clock latency of every call under `name`
+    (coroutine functions are timed until they complete)"""
+    def decorator(fn):
+        if HdrHistogram is None:
+            return fn
+        
+        if asyncio.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                start = time.perf_counter_ns()
+                try:
+                    return await fn(*args, **kwargs)
+                finally:
+                    _record_latency(name, start)
+            return async_wrapper
+        
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter_ns()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                _record_latency(name, start)
+        return wrapper
+    return decorator
+
+def get_latency_stats():
+    """
+    Get latency percentiles for every instrumented API call
+    
+    Returns:
+        dict: {name: {"count", "p50_ms", "p95_ms", "p99_ms", "max_ms"}}
+    """
+    with _LATENCY_LOCK:
+        return {
+            name: {
+                "count": h.get_total_count(),
+                "p50_ms": h.get_value_at_percentile(50) / 1e6,
+                "p95_ms": h.get_value_at_percentile(95) / 1e6,
+                "p99_ms": h.get_value_at_percentile(99) / 1e6,
+                "max_ms": h.get_max_value() / 1e6
+            }
+            for name, h in _LATENCY.items()
+        }
+
+# Parsed config cached in memory and re-read only when the file changes on disk
+_CONFIG_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "config", "config.yaml")
+_cfg_cache = {"mtime": None, "config": None}
+
+def _cfg():
+    """Return the cached config, reloading it if config.yaml was modified"""
+    try:
+        mtime = os.path.getmtime(_CONFIG_PATH)
+    except OSError:
+        mtime = None
+    if _cfg_cache["config"] is None or _cfg_cache["mtime"] != mtime:
+        _cfg_cache["config"] = load_config(_CONFIG_PATH)
+        _cfg_cache["mtime"] = mtime
+    return _cfg_cache["config"]
+
+NIFTY_INDEX_SYMBOL = "NSE:NIFTY50-INDEX"
+
+# Shared HTTP session so every REST call reuses pooled keep-alive connections
+_HTTP_SESSION = None
+
+def _get_http_session():
+    """Return the shared pooled requests.Session, creating it on first use"""
+    global _HTTP_SESSION
+    if _HTTP_SESSION is None:
+        session = requests.Session()
+        # Only idempotent requests are retried (urllib3's default allowed_methods),
+        # so a 5xx on an order POST never results in a duplicate order
+        retry = Retry(total=2, backoff_factor=0.1, status_forcelist=[502, 503, 504])
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16, max_retries=retry)
+        session.mount("https://", adapter)
+        session.headers.update({"Connection": "keep-alive"})
+        _HTTP_SESSION = session
+    return _HTTP_SESSION
+
+# Worker pool for basket order placement; sized within the HTTP connection pool
+_ORDER_POOL = ThreadPoolExecutor(max_workers=10)
+
+# Cached authenticated client, reused for as long as the access token is unchanged
+_FYERS_CLIENT_CACHE = {"client": None, "token": None}
+
+# Same safety margin token_helper.is_token_valid applies before a token expires
+_TOKEN_EXPIRY_BUFFER = datetime.timedelta(minutes=5)
+
+@functools.lru_cache(maxsize=4)
+def _parse_token_expiry(expiry_str):
+    """Parse a config token_expiry string ('%Y-%m-%d %H:%M:%S')"""
+    return datetime.datetime.strptime(expiry_str, '%Y-%m-%d %H:%M:%S')
+
+def _token_fresh(fyers_cfg):
+    """True if the config's access token is valid past the expiry buffer"""
+    try:
+        expiry = _parse_token_expiry(fyers_cfg['token_expiry'])
+    except (KeyError, TypeError, ValueError):
+        return False
+    return datetime.datetime.now() + _TOKEN_EXPIRY_BUFFER < expiry
+
+def _access_token(cache):
+    """
+    Return a valid access token for the client cached in `cache`
+    
+    The cached config is checked first; token_helper.ensure_valid_token (which
+    re-reads config.yaml and may re-authenticate) only runs when there is no
+    cached client for the current token or the token is about to expire.
+    
+    Args:
+        cache (dict): _FYERS_CLIENT_CACHE or _ASYNC_CLIENT_CACHE
+        
+    Returns:
+        str: Access token
+    """
+    fyers_cfg = _cfg().get('fyers', {})
+    access_token = fyers_cfg.get('access_token')
+    if cache["client"] is not None and cache["token"] == access_token and _token_fresh(fyers_cfg):
+        return access_token
+    return ensure_valid_token()
+
+def get_fyers_client(check_token=True, verify=False):
     """
     Create and return authenticated Fyers API client
     
+    The client is cached at module level and reused for as long as the
+    access token stays the same, so repeated calls skip object construction.
+    While the cached token is unexpired the check uses the in-memory config,
+    so no config.yaml read happens per call.
+    
     Args:
         check_token (bool): If True, verify and refresh token if needed
+        verify (bool): If True, test the connection with a profile API call
         
     Returns:
-        FyersModel: Authenticated Fyers client
+        FyersModel: Authenticated Fyers client, or None if no valid token could be
+        obtained (or, with verify=True, the profile check failed)
     """
     try:
         if check_token:
-            access_token = ensure_valid_token()
+            access_token = _access_token(_FYERS_CLIENT_CACHE)
         else:
-            config = load_config()
+            config = _cfg()
             access_token = config['fyers']['access_token']
         
-        client_id = load_config()['fyers']['client_id']
+        if not access_token:
+            logging.error("No valid Fyers access token available")
+            return None
+        
+        fyers = _FYERS_CLIENT_CACHE["client"]
+        if fyers is None or _FYERS_CLIENT_CACHE["token"] != access_token:
+            client_id = _cfg()['fyers']['client_id']
+            fyers = fyersModel.FyersModel(client_id=client_id, token=access_token, log_path="logs/")
+            # The sync SDK service issues every request through its own `session`;
+            # swap in the shared pool so sockets survive client rebuilds
+            if hasattr(fyers, 'service') and hasattr(fyers.service, 'session'):
+                fyers.service.session = _get_http_session()
+            _FYERS_CLIENT_CACHE["client"] = fyers
+            _FYERS_CLIENT_CACHE["token"] = access_token
         
-        fyers = fyersModel.FyersModel(client_id=client_id, token=access_token, log_path="logs/")
+        if not verify:
+            return fyers
         
         # Test connection with profile API
         profile_response = fyers.get_profile()
         if profile_response.get('s') == 'ok':
-            logging.info(f"Successfully authenticated with Fyers API for user: {profile_response.get('data', {}).get('name')}")
+            logging.info("Successfully authenticated with Fyers API for user: %s", profile_response.get('data', {}).get('name'))
             return fyers
         else:
-            logging.error(f"Fyers authentication failed: {profile_response}")
+            logging.error("Fyers authentication failed: %s", profile_response)
+            _FYERS_CLIENT_CACHE["client"] = None
+            _FYERS_CLIENT_CACHE["token"] = None
             return None
     except Exception as e:
-        logging.error(f"Error creating Fyers client: {str(e)}")
+        logging.error("Error creating Fyers client: %s", e)
         return None
 
-def place_market_order(fyers, symbol, qty, side):
+_WARMUP_THREAD = None
+
+# Keepalive pings only run while the market is open (Mon-Fri, 09:15-15:30 IST)
+_IST = ZoneInfo("Asia/Kolkata")
+_MARKET_OPEN = datetime.time(9, 15)
+_MARKET_CLOSE = datetime.time(15, 30)
+
+def _in_market_hours():
+    """True between market open and close on a weekday, in IST"""
+    now = datetime.datetime.now(_IST)
+    return now.weekday() < 5 and _MARKET_OPEN <= now.time() <= _MARKET_CLOSE
+
+def warmup(keepalive=False, interval=30):
+    """
+    Build the Fyers client and issue a first quotes() call ahead of trading
+    
+    Pays the token check, config load, DNS/TLS setup and first-request cost at
+    startup rather than when the first signal fires.
+    
+    Args:
+        keepalive (bool): If True, keep re-pinging the cached client in a
+                          background thread during market hours so the
+                          connection stays warm. The thread never
+                          re-authenticates; an expired token is left for the
+                          main thread to refresh.
+        interval (int): Seconds between keepalive pings
+        
+    Returns:
+        FyersModel: The warmed-up client, or None if it could not be created
+    """
+    global _WARMUP_THREAD
+    fyers = get_fyers_client()
+    if fyers:
+        get_quotes(fyers, [NIFTY_INDEX_SYMBOL])
+        logging.info("Fyers client warmed up")
+    
+    if keepalive and _WARMUP_THREAD is None:
+        def ping():
+            while True:
+                time.sleep(interval)
+                try:
+                    if not _in_market_hours():
+                        continue
+                    # Cached client only: token refresh may prompt on stdin,
+                    # which must stay with the main thread
+                    client = _FYERS_CLIENT_CACHE["client"]
+                    fyers_cfg = _cfg().get('fyers', {})
+                    if (client is None or _FYERS_CLIENT_CACHE["token"] != fyers_cfg.get('access_token')
+                            or not _token_fresh(fyers_cfg)):
+                        continue
+                    get_quotes(client, [NIFTY_INDEX_SYMBOL])
+                except Exception as e:
+                    logging.error("Keepalive ping failed: %s", e)
+        
+        _WARMUP_THREAD = threading.Thread(target=ping, name="fyers-keepalive", daemon=True)
+        _WARMUP_THREAD.start()
+    return fyers
+
+# Integer order sides as used by the Fyers API
+SIDE_BUY = 1
+SIDE_SELL = -1
+
+def _side_int(side):
+    """Return the integer side, accepting legacy "BUY"/"SELL" strings"""
+    if isinstance(side, int):
+        return side
+    return SIDE_BUY if side == "BUY" else SIDE_SELL
+
+# Pre-built order payload; _order_payload copies it and only fills in the variable fields
+_ORDER_TMPL = {
+    "symbol": None,
+    "qty": 0,
+    "type": 2,
+    "side": 0,
+    "productType": "INTRADAY",
+    "validity": "DAY",
+    "offlineOrder": False,
+    "stopPrice": 0,
+    "limitPrice": 0
+}
+
+# Fyers order type codes
+ORDER_TYPE_LIMIT = 1
+ORDER_TYPE_MARKET = 2
+ORDER_TYPE_SL = 3  # Stop order (SL-M)
+ORDER_TYPE_SL_LIMIT = 4  # Stop limit order (SL-L)
+_ORDER_TYPE_NAMES = {1: "Limit", 2: "Market", 3: "SL", 4: "SL-L"}
+
+def _order_payload(type_code, symbol, qty, side, stop=0, limit=0, base=None):
+    """
+    Build a Fyers order payload from _ORDER_TMPL
+    
+    Args:
+        type_code: Fyers order type (ORDER_TYPE_*)
+        symbol: Trading symbol (e.g., "NSE:NIFTY2560619500CE")
+        qty: Quantity to trade
+        side: SIDE_BUY (1) or SIDE_SELL (-1); "BUY"/"SELL" strings are still accepted
+        stop: Stop-loss trigger price (SL and SL-L orders)
+        limit: Limit price (limit and SL-L orders)
+        base: Optional caller payload whose other fields (productType, ...) are kept
+        
+    Returns:
+        dict: Order payload for fyers.place_order
     """
-    Place a market order using Fyers API
+    order_data = _ORDER_TMPL.copy()
+    if base:
+        order_data.update(base)
+    order_data["symbol"] = symbol
+    order_data["qty"] = qty
+    order_data["type"] = type_code
+    order_data["side"] = _side_int(side)
+    order_data["stopPrice"] = stop
+    order_data["limitPrice"] = limit
+    return order_data
+
+def _log_order(order_data, response):
+    """Log an order response; the SDK reports transport errors as a non-ok dict"""
+    name = _ORDER_TYPE_NAMES.get(order_data["type"])
+    if not isinstance(response, dict) or response.get('s') != 'ok':
+        logging.error("Error placing %s order: %s %s %s resp=%s", name,
+                      order_data["symbol"], order_data["side"], order_data["qty"], response)
+    else:
+        logging.info("%s order placed: %s %s %s stop=%s limit=%s resp=%s", name,
+                     order_data["symbol"], order_data["side"], order_data["qty"],
+                     order_data["stopPrice"], order_data["limitPrice"], response)
+    return response
+
+@_timed("place_order")
+def _send_order(fyers, order_data):
+    """Send one order payload with the sync client (every sync order path ends here)"""
+    return _log_order(order_data, fyers.place_order(data=order_data))
+
+@_timed("place_order")
+async def _asend_order(fyers, order_data):
+    """Async mirror of _send_order for the async client"""
+    return _log_order(order_data, await fyers.place_order(data=order_data))
+
+def _place(fyers, type_code, symbol, qty, side, stop=0, limit=0):
+    """
+    Place an order of any type using Fyers API
     
     Args:
         fyers: Authenticated Fyers client
+        type_code: Fyers order type (ORDER_TYPE_*)
         symbol: Trading symbol (e.g., "NSE:NIFTY2560619500CE")
         qty: Quantity to trade
-        side: "BUY" or "SELL"
+        side: SIDE_BUY (1) or SIDE_SELL (-1); "BUY"/"SELL" strings are still accepted
+        stop: Stop-loss trigger price (SL and SL-L orders)
+        limit: Limit price (limit and SL-L orders)
         
     Returns:
         Order response from Fyers API
     """
+    return _send_order(fyers, _order_payload(type_code, symbol, qty, side, stop, limit))
+
+def place_market_order(fyers, symbol, qty, side):
+    """Place a market order (see _place for arguments)"""
+    return _place(fyers, ORDER_TYPE_MARKET, symbol, qty, side)
+
+# Shared aiohttp session for the async helpers; aiohttp sessions are bound to
+# the event loop they were created in, so one is kept per running loop
+_AIO_SESSION = None
+_AIO_SESSION_LOOP = None
+_ASYNC_CLIENT_CACHE = {"client": None, "token": None}
+
+def _get_aio_session():
+    """Return the shared pooled aiohttp session for the running event loop"""
+    global _AIO_SESSION, _AIO_SESSION_LOOP
+    loop = asyncio.get_running_loop()
+    if _AIO_SESSION is None or _AIO_SESSION.closed or _AIO_SESSION_LOOP is not loop:
+        connector = aiohttp.TCPConnector(limit=32, keepalive_timeout=60)
+        _AIO_SESSION = aiohttp.ClientSession(connector=connector)
+        _AIO_SESSION_LOOP = loop
+    return _AIO_SESSION
+
+_ASYNC_LOOP = None
+_ASYNC_LOOP_LOCK = threading.Lock()
+
+def submit_async(coro):
+    """
+    Schedule a coroutine on the shared background event loop without waiting
+    
+    The loop lives in a daemon thread for the life of the process, so the
+    aiohttp session from _get_aio_session() and its keep-alive connections are
+    reused by every call made from sync code (scheduler jobs, websocket callbacks).
+    
+    Args:
+        coro: Coroutine to run
+        
+    Returns:
+        concurrent.futures.Future: Resolves to the coroutine's result
+    """
+    global _ASYNC_LOOP
+    with _ASYNC_LOOP_LOCK:
+        if _ASYNC_LOOP is None or _ASYNC_LOOP.is_closed():
+            _ASYNC_LOOP = asyncio.new_event_loop()
+            threading.Thread(target=_ASYNC_LOOP.run_forever, name="fyers-async-loop", daemon=True).start()
+    return asyncio.run_coroutine_threadsafe(coro, _ASYNC_LOOP)
+
+def run_async(coro, timeout=None):
+    """
+    Run a coroutine on the shared background event loop and wait for the result
+    
+    Args:
+        coro: Coroutine to run
+        timeout (float): Seconds to wait for the result, None to wait forever
+        
+    Returns:
+        The coroutine's result
+        
+    Raises:
+        concurrent.futures.TimeoutError: If timeout expires. The coroutine is
+        cancelled, but a request it already sent may still take effect.
+    """
+    future = submit_async(coro)
     try:
-        order_data = {
-            "symbol": symbol,
-            "qty": qty,
-            "type": 2,  # 2 = Market order
-            "side": 1 if side == "BUY" else -1,  # 1 = Buy, -1 = Sell
-            "productType": "INTRADAY",
-            "validity": "DAY",
-            "offlineOrder": False,
-            "stopPrice": 0,
-            "limitPrice": 0
-        }
+        return future.result(timeout)
+    except FutureTimeoutError:
+        future.cancel()
+        raise
+
+async def close_async_session():
+    """Close the shared aiohttp session (call before the event loop shuts down)"""
+    global _AIO_SESSION, _AIO_SESSION_LOOP
+    if _AIO_SESSION is not None and not _AIO_SESSION.closed:
+        await _AIO_SESSION.close()
+    _AIO_SESSION = None
+    _AIO_SESSION_LOOP = None
+
+def get_async_fyers_client(check_token=True):
+    """
+    Create and return an async Fyers API client
+    
+    Must be called from inside a running event loop. API methods on the
+    returned client are coroutines and share one pooled aiohttp session.
+    
+    Args:
+        check_token (bool): If True, verify and refresh token if needed
         
-        response = fyers.place_order(data=order_data)
-        logging.info(f"Order placed: {symbol} {side} {qty} - Response: {response}")
-        return response
+    Returns:
+        FyersModel: Async Fyers client
+    """
+    try:
+        if check_token:
+            access_token = _access_token(_ASYNC_CLIENT_CACHE)
+        else:
+            access_token = _cfg()['fyers']['access_token']
+        
+        if not access_token:
+            logging.error("No valid Fyers access token available")
+            return None
+        
+        fyers = _ASYNC_CLIENT_CACHE["client"]
+        if fyers is None or _ASYNC_CLIENT_CACHE["token"] != access_token:
+            client_id = _cfg()['fyers']['client_id']
+            fyers = fyersModel.FyersModel(is_async=True, client_id=client_id, token=access_token, log_path="logs/")
+            _ASYNC_CLIENT_CACHE["client"] = fyers
+            _ASYNC_CLIENT_CACHE["token"] = access_token
+        
+        # Point the SDK at the shared session and stop it closing it on client.close()
+        fyers.service.session = _get_aio_session()
+        fyers.service._session_created_here = False
+        return fyers
     except Exception as e:
-        logging.error(f"Error placing order: {str(e)}")
+        logging.error("Error creating async Fyers client: %s", e)
         return None
 
+async def aplace_market_order(fyers, symbol, qty, side):
+    """
+    Async mirror of place_market_order; await several with asyncio.gather to
+    place them concurrently
+    
+    Args:
+        fyers: Async Fyers client from get_async_fyers_client()
+        symbol: Trading symbol (e.g., "NSE:NIFTY2560619500CE")
+        qty: Quantity to trade
+        side: SIDE_BUY (1) or SIDE_SELL (-1)
+        
+    Returns:
+        Order response from Fyers API
+    """
+    return await _asend_order(fyers, _order_payload(ORDER_TYPE_MARKET, symbol, qty, side))
+
+async def aexit_position(fyers, symbol, qty, side):
+    """Async mirror of exit_position"""
+    return await aplace_market_order(fyers, symbol, qty, side)
+
+def _parse_quotes(response):
+    """Map a Fyers quotes response to {symbol: last traded price}"""
+    return {
+        quote["n"]: quote["v"]["lp"]
+        for quote in response.get("d", [])
+        if quote.get("s") == "ok" and "lp" in quote.get("v", {})
+    }
+
+async def aget_quotes(fyers, symbols):
+    """Async mirror of get_quotes"""
+    try:
+        response = await fyers.quotes(data={"symbols": ",".join(symbols)})
+        if response.get('s') != 'ok':
+            logging.error("Failed to get quotes: %s", response)
+            return {}
+        return _parse_quotes(response)
+    except Exception as e:
+        logging.error("Error getting quotes: %s", e)
+        return {}
+
+async def aget_nifty_spot_price(fyers=None):
+    """
+    Get the current Nifty 50 spot price asynchronously
+    
+    Args:
+        fyers: Async Fyers client (created from the cache if None)
+        
+    Returns:
+        float: Last traded price of NSE:NIFTY50-INDEX, or None on failure
+    """
+    if fyers is None:
+        fyers = get_async_fyers_client()
+    return (await aget_quotes(fyers, [NIFTY_INDEX_SYMBOL])).get(NIFTY_INDEX_SYMBOL)
+
+@_timed("quotes")
+def get_quotes(fyers, symbols):
+    """
+    Get last traded prices for several symbols in a single quotes() call
+    
+    Args:
+        fyers: Authenticated Fyers client
+        symbols: List of symbols (up to 50, e.g. spot plus ATM CE/PE)
+        
+    Returns:
+        dict: {symbol: last traded price} for every symbol that was quoted
+    """
+    try:
+        response = fyers.quotes(data={"symbols": ",".join(symbols)})
+        if response.get('s') != 'ok':
+            logging.error("Failed to get quotes: %s", response)
+            return {}
+        return _parse_quotes(response)
+    except Exception as e:
+        logging.error("Error getting quotes: %s", e)
+        return {}
+
+def get_nifty_spot_price(fyers=None):
+    """
+    Get the current Nifty 50 spot price
+    
+    Args:
+        fyers: Authenticated Fyers client (falls back to the cached client if None)
+        
+    Returns:
+        float: Last traded price of NSE:NIFTY50-INDEX, or None on failure
+    """
+    if fyers is None:
+        fyers = get_fyers_client()
+        if fyers is None:
+            return None
+    return get_quotes(fyers, [NIFTY_INDEX_SYMBOL]).get(NIFTY_INDEX_SYMBOL)
+
+@_timed("modify_order")
 def modify_order(fyers, order_id, price=None, stop_price=None):
     """Modify an existing order (for SL/target modifications)"""
-    try:
-        modify_data = {
-            "id": order_id
-        }
+    modify_data = {
+        "id": order_id
+    }
+    
+    if price is not None:
+        modify_data["limitPrice"] = price
         
-        if price is not None:
-            modify_data["limitPrice"] = price
-            
-        if stop_price is not None:
-            modify_data["stopPrice"] = stop_price
-            
-        response = fyers.modify_order(data=modify_data)
-        logging.info(f"Order modified: {order_id} - Response: {response}")
+    if stop_price is not None:
+        modify_data["stopPrice"] = stop_price
+        
+    # The SDK catches transport errors itself and returns them as an error dict
+    response = fyers.modify_order(data=modify_data)
+    if not isinstance(response, dict) or response.get('s') != 'ok':
+        logging.error("Error modifying order %s: %s", order_id, response)
         return response
-    except Exception as e:
-        logging.error(f"Error modifying order: {str(e)}")
-        return None
+    logging.info("Order modified: %s resp=%s", order_id, response)
+    return response
 
 def exit_position(fyers, symbol, qty, side):
     """Exit an existing position"""
     try:
         return place_market_order(fyers, symbol, qty, side)
     except Exception as e:
-        logging.error(f"Error exiting position: {str(e)}")
+        logging.error("Error exiting position: %s", e)
         return None
 
 def get_current_positions(fyers):
@@ -107,125 +653,347 @@ def get_current_positions(fyers):
         positions = fyers.positions()
         return positions
     except Exception as e:
-        logging.error(f"Error getting positions: {str(e)}")
+        logging.error("Error getting positions: %s", e)
         return None
 
 def place_limit_order(fyers, symbol, qty, side, limit_price):
+    """Place a limit order (see _place for arguments)"""
+    return _place(fyers, ORDER_TYPE_LIMIT, symbol, qty, side, limit=limit_price)
+
+def place_sl_order(fyers, symbol, qty, side, trigger_price):
+    """Place a stop-loss (SL-M) order (see _place for arguments)"""
+    return _place(fyers, ORDER_TYPE_SL, symbol, qty, side, stop=trigger_price)
+
+def place_sl_limit_order(fyers, symbol, qty, side, trigger_price, limit_price):
+    """Place a stop-loss limit (SL-L) order (see _place for arguments)"""
+    return _place(fyers, ORDER_TYPE_SL_LIMIT, symbol, qty, side, stop=trigger_price, limit=limit_price)
+
+def place_orders_batch(fyers, orders, timeout=10):
     """
-    Place a limit order using Fyers API
+    Place several orders concurrently (e.g. the legs of a basket)
+    
+    BUY legs are submitted before SELL legs so hedges are in place first.
     
     Args:
         fyers: Authenticated Fyers client
-        symbol: Trading symbol (e.g., "NSE:NIFTY2560619500CE")
-        qty: Quantity to trade
-        side: "BUY" or "SELL"
-        limit_price: Limit price for the order
+        orders: List of Fyers order payloads (same format as place_order data)
+        timeout: Maximum seconds to wait for all orders to complete
         
     Returns:
-        Order response from Fyers API
+        list: Order responses in the same order as `orders` (None for failures)
     """
+    # Fill each payload from the template (normalising legacy "BUY"/"SELL" sides),
+    # then sort indices so side=1 (BUY) is submitted before side=-1 (SELL)
+    orders = [
+        _order_payload(
+            order_data.get("type", ORDER_TYPE_MARKET), order_data.get("symbol"), order_data.get("qty", 0),
+            order_data.get("side", 0), order_data.get("stopPrice", 0), order_data.get("limitPrice", 0),
+            base=order_data
+        )
+        for order_data in orders
+    ]
+    submit_order = sorted(range(len(orders)), key=lambda i: -orders[i]["side"])
+    futures = {i: _ORDER_POOL.submit(_send_order, fyers, orders[i]) for i in submit_order}
+    wait(futures.values(), timeout=timeout)
+    
+    responses = []
+    for i, order_data in enumerate(orders):
+        future = futures[i]
+        if not future.done():
+            logging.error("Timed out placing batch order: %s", order_data.get('symbol'))
+            responses.append(None)
+        elif future.exception() is not None:
+            logging.error("Error placing batch order %s: %s", order_data.get('symbol'), future.exception())
+            responses.append(None)
+        else:
+            responses.append(future.result())
+    return responses
+
+# Latest order-socket update per order id, bounded and expired after a trading day
+_ORDER_STATE = TTLCache(maxsize=4096, ttl=86400)
+_ORDER_STATE_COND = threading.Condition()
+_ORDER_WS = None
+_ORDER_WS_TOKEN = None
+_ORDER_WS_STARTING = False
+
+def _ws_token(fyers):
+    """Socket access token ("client_id:token") for a Fyers client"""
+    return f"{fyers.client_id}:{fyers.token}"
+
+def _order_ws_live(fyers):
+    """True if the order socket is connected with fyers' current token"""
     try:
-        order_data = {
-            "symbol": symbol,
-            "qty": qty,
-            "type": 1,  # 1 = Limit order
-            "side": 1 if side == "BUY" else -1,  # 1 = Buy, -1 = Sell
-            "productType": "INTRADAY",
-            "validity": "DAY",
-            "offlineOrder": False,
-            "stopPrice": 0,
-            "limitPrice": limit_price
-        }
-        
-        response = fyers.place_order(data=order_data)
-        logging.info(f"Limit order placed: {symbol} {side} {qty} @ {limit_price} - Response: {response}")
-        return response
-    except Exception as e:
-        logging.error(f"Error placing limit order: {str(e)}")
-        return None
+        return (_ORDER_WS is not None and _ORDER_WS_TOKEN == _ws_token(fyers)
+                and _ORDER_WS.is_connected())
+    except Exception:
+        return False
 
-def place_sl_order(fyers, symbol, qty, side, trigger_price):
+def _stop_order_ws():
+    """Close the order socket and drop the updates it recorded"""
+    global _ORDER_WS, _ORDER_WS_TOKEN
+    ws_client = _ORDER_WS
+    _ORDER_WS = None
+    _ORDER_WS_TOKEN = None
+    with _ORDER_STATE_COND:
+        _ORDER_STATE.clear()
+    if ws_client is not None:
+        try:
+            ws_client.close_connection()
+        except Exception as e:
+            logging.warning("Error closing order WebSocket: %s", e)
+
+def _start_order_ws(fyers):
     """
-    Place a stop-loss order using Fyers API
+    Start (once) an order websocket that records every order update in _ORDER_STATE
+    
+    Updates are stored in the REST get_orders() shape, {"s": ..., "orderBook": [order]},
+    so callers see the same response whichever source served it.
     
     Args:
-        fyers: Authenticated Fyers client
-        symbol: Trading symbol (e.g., "NSE:NIFTY2560619500CE")
-        qty: Quantity to trade
-        side: "BUY" or "SELL"
-        trigger_price: Stop-loss trigger price
+        fyers: Authenticated Fyers client (its credentials are reused for the socket)
         
     Returns:
-        Order response from Fyers API
+        FyersOrderSocket: The running order socket, or None if it could not be started
     """
+    global _ORDER_WS, _ORDER_WS_TOKEN
+    if _ORDER_WS is not None:
+        return _ORDER_WS
+    
     try:
-        order_data = {
-            "symbol": symbol,
-            "qty": qty,
-            "type": 3,  # 3 = Stop order (SL-M)
-            "side": 1 if side == "BUY" else -1,
-            "productType": "INTRADAY",
-            "validity": "DAY",
-            "offlineOrder": False, 
-            "stopPrice": trigger_price,
-            "limitPrice": 0
-        }
+        def on_orders(message):
+            order = message.get('orders', {}) if isinstance(message, dict) else {}
+            order_id = order.get('id')
+            if order_id:
+                with _ORDER_STATE_COND:
+                    _ORDER_STATE[order_id] = {"s": message.get('s', 'ok'), "orderBook": [order]}
+                    _ORDER_STATE_COND.notify_all()
         
-        response = fyers.place_order(data=order_data)
-        logging.info(f"SL order placed: {symbol} {side} {qty} @ trigger {trigger_price} - Response: {response}")
-        return response
+        def on_error(error):
+            logging.error("Order WebSocket error: %s", error)
+            
+        def on_close(message):
+            logging.info("Order WebSocket connection closed: %s", message)
+            # Updates missed while disconnected would leave these stale
+            with _ORDER_STATE_COND:
+                _ORDER_STATE.clear()
+            
+        def on_connect():
+            ws_client.subscribe(data_type="OnOrders")
+            logging.info("Order WebSocket connection opened")
+        
+        ws_client = order_ws.FyersOrderSocket(
+            access_token=_ws_token(fyers),
+            write_to_file=False,
+            log_path="logs/",
+            on_orders=on_orders,
+            on_error=on_error,
+            on_connect=on_connect,
+            on_close=on_close
+        )
+        ws_client.connect()
+        _ORDER_WS = ws_client
+        _ORDER_WS_TOKEN = _ws_token(fyers)
+        return ws_client
     except Exception as e:
-        logging.error(f"Error placing SL order: {str(e)}")
+        logging.error("Error starting order WebSocket: %s", e)
         return None
 
-def place_sl_limit_order(fyers, symbol, qty, side, trigger_price, limit_price):
+def _start_order_ws_background(fyers):
     """
-    Place a stop-loss limit order using Fyers API
+    Start the order websocket in a daemon thread so callers never wait on connect()
+    
+    A socket opened with an older access token (daily rotation) is closed and
+    replaced by one using fyers' current token.
+    """
+    global _ORDER_WS_STARTING
+    with _ORDER_STATE_COND:
+        if _ORDER_WS_STARTING:
+            return
+        if _ORDER_WS is not None:
+            if _ORDER_WS_TOKEN == _ws_token(fyers):
+                return
+            logging.info("Access token changed; restarting order WebSocket")
+        _ORDER_WS_STARTING = True
+    
+    if _ORDER_WS is not None:
+        _stop_order_ws()
+    
+    def start():
+        global _ORDER_WS_STARTING
+        try:
+            _start_order_ws(fyers)
+        finally:
+            with _ORDER_STATE_COND:
+                _ORDER_WS_STARTING = False
+    
+    threading.Thread(target=start, name="fyers-order-ws", daemon=True).start()
+
+@_timed("get_order_status")
+def _fetch_order(fyers, order_id):
+    """REST order lookup, timed on its own so socket hits stay out of the histogram"""
+    return fyers.get_orders(data={"id": order_id})
+
+def get_order_status(fyers, order_id, wait_for=0):
+    """
+    Get status of an existing order
+    
+    Served from the latest order websocket update when one has been pushed
+    for the order and the socket is connected with the current token,
+    otherwise from a REST lookup. REST results are not cached; only the
+    websocket writes _ORDER_STATE.
     
     Args:
         fyers: Authenticated Fyers client
-        symbol: Trading symbol (e.g., "NSE:NIFTY2560619500CE")
-        qty: Quantity to trade
-        side: "BUY" or "SELL"
-        trigger_price: Stop-loss trigger price
-        limit_price: Limit price for order execution
+        order_id: Fyers order id
+        wait_for: Seconds to wait for a websocket update before using REST
         
     Returns:
-        Order response from Fyers API
+        dict: get_orders() response, {"s": ..., "orderBook": [...]}
     """
     try:
-        order_data = {
-            "symbol": symbol,
-            "qty": qty,
-            "type": 4,  # 4 = Stop limit order (SL-L)
-            "side": 1 if side == "BUY" else -1,
-            "productType": "INTRADAY",
-            "validity": "DAY",
-            "offlineOrder": False,
-            "stopPrice": trigger_price,
-            "limitPrice": limit_price
-        }
+        _start_order_ws_background(fyers)
+        
+        if _order_ws_live(fyers):
+            with _ORDER_STATE_COND:
+                if wait_for:
+                    _ORDER_STATE_COND.wait_for(lambda: order_id in _ORDER_STATE, timeout=wait_for)
+                status = _ORDER_STATE.get(order_id)
+            if status is not None:
+                return status
         
-        response = fyers.place_order(data=order_data)
-        logging.info(f"SL-L order placed: {symbol} {side} {qty} @ trigger {trigger_price}, limit {limit_price} - Response: {response}")
+        response = _fetch_order(fyers, order_id)
+        if logging.getLogger().isEnabledFor(logging.DEBUG):
+            logging.debug("Order status for %s: %s", order_id, response)
         return response
     except Exception as e:
-        logging.error(f"Error placing SL-L order: {str(e)}")
+        logging.error("Error getting order status: %s", e)
         return None
 
-def get_order_status(fyers, order_id):
-    """Get status of an existing order"""
-    try:
-        data = {
-            "id": order_id
-        }
-        response = fyers.get_orders(data=data)
-        logging.info(f"Order status for {order_id}: {response}")
-        return response
-    except Exception as e:
-        logging.error(f"Error getting order status: {str(e)}")
-        return None
+# On-disk parquet cache for historical candles
+_HIST_CACHE_DIR = os.path.join("data", "cache", "historical")
 
+def _resolution_seconds(resolution):
+    """
+    Convert a Fyers candle resolution to seconds
+    
+    Accepts minute ("1", "5", "60"), second ("5S", "30S") and daily ("D", "1D")
+    resolutions; returns None for anything else so callers can skip caching.
+    """
+    resolution = str(resolution).strip().upper()
+    if resolution in ("D", "1D"):
+        return 86400
+    if resolution.endswith("S") and resolution[:-1].isdigit():
+        return int(resolution[:-1])
+    if resolution.isdigit():
+        return int(resolution) * 60
+    return None
+
+def _as_epoch(value):
+    """Return value as epoch seconds, or None if it is a date string"""
+    if isinstance(value, (int, float)):
+        return int(value)
+    if isinstance(value, str) and value.isdigit():
+        return int(value)
+    return None
+
+def _cached_history(fetch):
+    """
+    Cache historical candles on disk as parquet, keyed by (symbol, resolution, range_from)
+    
+    On a hit only the missing tail after the last cached candle is requested. The
+    last cached candle is re-fetched too, since it may have been incomplete when
+    stored. Date-string ranges, unrecognised resolutions and installs without
+    pyarrow bypass the cache.
+    """
+    @functools.wraps(fetch)
+    def wrapper(fyers, symbol, resolution, date_format, range_from, range_to):
+        epoch_from = _as_epoch(range_from)
+        epoch_to = _as_epoch(range_to)
+        bar_seconds = _resolution_seconds(resolution)
+        if pq is None or epoch_from is None or epoch_to is None or bar_seconds is None:
+            return fetch(fyers, symbol, resolution, date_format, range_from, range_to)
+        
+        key = hashlib.sha1(f"{symbol}|{resolution}|{epoch_from}".encode()).hexdigest()
+        path = os.path.join(_HIST_CACHE_DIR, f"{key}.parquet")
+        
+        cached = None
+        if os.path.exists(path):
+            try:
+                cached = pq.read_table(path).to_pandas()
+            except Exception as e:
+                logging.warning("Ignoring unreadable historical cache %s: %s", path, e)
+        
+        if cached is not None and not cached.empty:
+            last_ts = int(cached['datetime'].iloc[-1].timestamp())
+            if last_ts + bar_seconds > epoch_to:
+                df = cached
+            else:
+                tail = fetch(fyers, symbol, resolution, date_format, last_ts, range_to)
+                if tail is None:
+                    return None
+                df = (pd.concat([cached, tail], ignore_index=True)
+                      .drop_duplicates(subset='datetime', keep='last')
+                      .reset_index(drop=True))
+        else:
+            df = fetch(fyers, symbol, resolution, date_format, range_from, range_to)
+            if df is None:
+                return None
+        
+        if df is not cached:
+            try:
+                os.makedirs(_HIST_CACHE_DIR, exist_ok=True)
+                pq.write_table(pa.Table.from_pandas(df, preserve_index=False), path)
+            except Exception as e:
+                logging.warning("Could not write historical cache %s: %s", path, e)
+        
+        end = pd.to_datetime(epoch_to, unit='s')
+        return df[df['datetime'] <= end].reset_index(drop=True)
+    return wrapper
+
+# Short-lived in-process caches that dedupe identical calls within a bar
+_TTL_LOCK = threading.Lock()
+_OC_CACHE = TTLCache(maxsize=64, ttl=5)
+_HIST_TTL_CACHES = {}
+
+def _ttl_cached_history(fetch):
+    """
+    Memoize historical fetches on (symbol, resolution, range_from, range_to)
+    
+    The TTL is half the candle resolution, capped at 5 minutes, so repeated
+    calls inside one bar share a single response. Failed fetches and unrecognised
+    resolutions are not cached.
+    """
+    @functools.wraps(fetch)
+    def wrapper(fyers, symbol, resolution, date_format, range_from, range_to):
+        bar_seconds = _resolution_seconds(resolution)
+        if bar_seconds is None:
+            return fetch(fyers, symbol, resolution, date_format, range_from, range_to)
+        ttl = min(max(bar_seconds // 2, 5), 300)
+        key = (symbol, str(resolution), range_from, range_to)
+        with _TTL_LOCK:
+            cache = _HIST_TTL_CACHES.get(ttl)
+            if cache is None:
+                cache = _HIST_TTL_CACHES[ttl] = TTLCache(maxsize=256, ttl=ttl)
+            df = cache.get(key)
+        if df is not None:
+            return df.copy(deep=False)
+        
+        df = fetch(fyers, symbol, resolution, date_format, range_from, range_to)
+        if df is None:
+            return None
+        with _TTL_LOCK:
+            cache[key] = df
+        # Callers get their own frame so in-place edits can't leak into the cache
+        return df.copy(deep=False)
+    return wrapper
+
+@_timed("get_historical_data")
+def _fetch_history(fyers, data):
+    """SDK history call, timed below the caches so hits don't skew the histogram"""
+    return fyers.get_historical_data(data)
+
+@_ttl_cached_history
+@_cached_history
 def get_historical_data(fyers, symbol, resolution, date_format, range_from, range_to):
     """
     Get historical data for a symbol
@@ -251,20 +1019,33 @@ def get_historical_data(fyers, symbol, resolution, date_format, range_from, rang
             "cont_flag": "1"
         }
         
-        response = fyers.get_historical_data(data)
+        response = _fetch_history(fyers, data)
         
         if isinstance(response, dict) and 'candles' in response:
-            df = pd.DataFrame(response['candles'], columns=['datetime', 'open', 'high', 'low', 'close', 'volume'])
-            if date_format == 1:  # If date is in epoch format
-                df['datetime'] = pd.to_datetime(df['datetime'], unit='s')
+            # Candles are [epoch, open, high, low, close, volume] rows; convert once to a
+            # float matrix and build the frame from column slices
+            candles = np.asarray(response['candles'], dtype=np.float64).reshape(-1, 6)
+            df = pd.DataFrame({
+                'datetime': pd.to_datetime(candles[:, 0].astype('int64'), unit='s'),
+                'open': candles[:, 1],
+                'high': candles[:, 2],
+                'low': candles[:, 3],
+                'close': candles[:, 4],
+                'volume': candles[:, 5]
+            })
             return df
         else:
-            logging.error(f"Invalid response format: {response}")
+            logging.error("Invalid response format: %s", response)
             return None
     except Exception as e:
-        logging.error(f"Error getting historical data: {str(e)}")
+        logging.error("Error getting historical data: %s", e)
         return None
 
+@_timed("get_option_chain")
+def _fetch_option_chain(fyers, underlying):
+    """SDK option chain call, timed below the TTL cache"""
+    return fyers.get_option_chain({"symbol": underlying})
+
 def get_option_chain(fyers, underlying):
     """
     Get option chain data for an underlying
@@ -276,64 +1057,136 @@ def get_option_chain(fyers, underlying):
     Returns:
         dict: Option chain data
     """
+    with _TTL_LOCK:
+        cached = _OC_CACHE.get(underlying)
+    if cached is not None:
+        return copy.deepcopy(cached)
+    
     try:
-        response = fyers.get_option_chain({"symbol": underlying})
-        logging.info(f"Option chain fetched for {underlying}")
+        response = _fetch_option_chain(fyers, underlying)
+        logging.info("Option chain fetched for %s", underlying)
+        if response is not None:
+            # The nested response is cached as-is and every caller gets a copy
+            with _TTL_LOCK:
+                _OC_CACHE[underlying] = copy.deepcopy(response)
         return response
     except Exception as e:
-        logging.error(f"Error getting option chain: {str(e)}")
+        logging.error("Error getting option chain: %s", e)
         return None
 
-def start_market_data_websocket(symbols, data_type="symbolData"):
+@functools.lru_cache(maxsize=16)
+def build_symbol_table(underlying, expiry, atm, width=20, step=50):
+    """
+    Pre-build option symbols for every strike within `width` steps of ATM
+    
+    Built once per (underlying, expiry, atm) and cached; symbols are interned
+    so dict lookups keyed on them reuse the cached hash.
+    
+    Args:
+        underlying: Symbol root (e.g., "NIFTY")
+        expiry: Expiry string as used in Fyers symbols (e.g., "25JUN19")
+        atm: At-the-money strike
+        width: Number of strikes on each side of ATM
+        step: Strike interval
+        
+    Returns:
+        Mapping: Read-only {(strike, "CE"/"PE"): symbol}
+    """
+    table = {}
+    for k in range(-width, width + 1):
+        strike = atm + k * step
+        for option_type in ("CE", "PE"):
+            table[(strike, option_type)] = sys.intern(f"NSE:{underlying}{expiry}{strike}{option_type}")
+    return types.MappingProxyType(table)
+
+# Ticks are handed off from the socket thread to a consumer thread through a
+# bounded queue so bursts never block the socket read loop
+_TICK_Q = queue.Queue(maxsize=10000)
+_TICK_STATS = {"received": 0, "dropped": 0, "processed": 0}
+_TICK_CONSUMER = None
+
+def _consume_ticks():
+    """Drain the tick queue, doing the logging/parsing off the socket thread"""
+    while True:
+        on_tick, message = _TICK_Q.get()
+        try:
+            if logging.getLogger().isEnabledFor(logging.DEBUG):
+                logging.debug("WebSocket message: %s", message)
+            if on_tick is not None:
+                on_tick(message)
+        except Exception as e:
+            logging.error("Error processing WebSocket message: %s", e)
+        finally:
+            _TICK_STATS["processed"] += 1
+            _TICK_Q.task_done()
+
+def get_tick_stats():
+    """Return counters for received, dropped and processed websocket messages"""
+    return dict(_TICK_STATS, queued=_TICK_Q.qsize())
+
+# Map the data types used in this project to the SDK's subscription names
+_WS_DATA_TYPES = {"symbolData": "SymbolUpdate", "depthData": "DepthUpdate"}
+
+def start_market_data_websocket(symbols, data_type="symbolData", lite=True, on_tick=None):
     """
     Start a websocket connection for market data
     
     Args:
         symbols: List of symbols to subscribe to
         data_type: Type of data to receive (symbolData, depthData)
+        lite: If True, only LTP is streamed (much smaller ticks). Consumers that
+              need full quotes or depth must pass lite=False
+        on_tick: Optional callback invoked with each message on the consumer thread
         
     Returns:
         WebSocket connection object
     """
+    global _TICK_CONSUMER
     try:
-        config = load_config()
+        config = _cfg()
         client_id = config['fyers']['client_id']
         access_token = ensure_valid_token()
         
+        if _TICK_CONSUMER is None:
+            _TICK_CONSUMER = threading.Thread(target=_consume_ticks, name="tick-consumer", daemon=True)
+            _TICK_CONSUMER.start()
+        
         def on_message(message):
-            logging.info(f"WebSocket message: {message}")
-            # Process the message here
+            _TICK_STATS["received"] += 1
+            try:
+                _TICK_Q.put_nowait((on_tick, message))
+            except queue.Full:
+                _TICK_STATS["dropped"] += 1
             
         def on_error(error):
-            logging.error(f"WebSocket error: {error}")
+            logging.error("WebSocket error: %s", error)
             
-        def on_close():
-            logging.info("WebSocket connection closed")
+        def on_close(message):
+            logging.info("WebSocket connection closed: %s", message)
             
         def on_open():
             logging.info("WebSocket connection opened")
         
-        # Initialize WebSocket
+        # Initialize WebSocket; callbacks must be passed to the constructor since
+        # the SDK dispatches through its own OnMessage/OnError/OnOpen/OnClose slots
         ws_client = data_ws.FyersDataSocket(
             access_token=f"{client_id}:{access_token}",
             log_path="logs/",
-            litemode=False,
-            write_to_file=False
+            litemode=lite and data_type != "depthData",
+            write_to_file=False,
+            on_message=on_message,
+            on_error=on_error,
+            on_connect=on_open,
+            on_close=on_close
         )
         
-        # Assign callbacks
-        ws_client.on_message = on_message
-        ws_client.on_error = on_error
-        ws_client.on_close = on_close
-        ws_client.on_open = on_open
-        
         # Subscribe to symbols
-        ws_client.subscribe(symbols=symbols, data_type=data_type)
+        ws_client.subscribe(symbols=symbols, data_type=_WS_DATA_TYPES.get(data_type, data_type))
         
         # Connect
         ws_client.connect()
         
         return ws_client
     except Exception as e:
-        logging.error(f"Error starting market data WebSocket: {str(e)}")
-        return None
\ No newline at end of file
+        logging.error("Error starting market data WebSocket: %s", e)
+        return None
@@ -13,6 +13,7 @@ from strategy import OpenInterestStrategy
 from config import load_config
 from token_helper import ensure_valid_token
 from auth import generate_access_token
+from src.fyers_api_utils import warmup
 
 # Ensure logs directory exists
 os.makedirs('logs', exist_ok=True)
@@ -27,8 +28,7 @@ logging.basicConfig(
 def job():
     """Run the strategy job at specified intervals"""
     try:
-        strategy = strategy_instance
-        strategy.run_strategy()
+        strategy_instance.run_strategy()
     except Exception as e:
         logging.error(f"Error in scheduled job: {str(e)}")
 
@@ -60,13 +60,20 @@ if __name__ == "__main__":
             
         logging.info("Strategy initialized successfully.")
         
+        # Warm up the API client so the first trade doesn't pay connection setup
+        warmup(keepalive=True)
+        
         # Schedule jobs
         # Run every minute during market hours
         # schedule.every().monday.to.friday.at("09:15").do(strategy_instance.initialize_day)  # This syntax is incorrect
         
-        # Correct way to schedule for weekdays at 9:15 AM
-        for day in ['monday', 'tuesday', 'wednesday', 'thursday', 'friday']:
-            schedule.every().__getattribute__(day).at("09:15").do(strategy_instance.initialize_day)
+        # Correct way to schedule for weekdays at 9:15 AM IST (host timezone independent,
+        # like the 9:20 analysis below)
+        for day in ('monday', 'tuesday', 'wednesday', 'thursday', 'friday'):
+            getattr(schedule.every(), day).at("09:15", "Asia/Kolkata").do(strategy_instance.initialize_day)
+        
+        # Open interest analysis runs once at 9:20 IST instead of being polled for
+        strategy_instance.schedule_jobs()
         
         # Run the job every minute during market hours
         # Note: The between method may not be available in this version of the schedule module
@@ -74,10 +81,13 @@ if __name__ == "__main__":
         
         logging.info("Strategy scheduled. Running main loop...")
         
-        # Main loop
+        # Main loop: sleep until the next job is due (capped at a minute)
         while True:
             schedule.run_pending()
-            time.sleep(1)
+            delay = schedule.idle_seconds()
+            if delay is None:
+                break
+            time.sleep(min(max(delay, 0), 60))
             
     except KeyboardInterrupt:
         logging.info("Strategy execution stopped by user.")
@@ -1,61 +1,235 @@
 import requests
 import pandas as pd
+import numpy as np
 import logging
 import datetime
+import functools
+import time
 from io import StringIO
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from src.fyers_api_utils import get_fyers_client
+from src.config import load_config
 
-def get_nifty_option_chain():
+try:
+    import orjson
+except ImportError:  # optional: fall back to requests' stdlib json decoding
+    orjson = None
+
+try:
+    from numba import njit
+except ImportError:  # optional: the array kernels below run as plain Python
+    njit = None
+
+def _kernel(func):
+    """Compile func with Numba (cached on disk) when it's installed"""
+    if njit is None:
+        return func
+    return njit(cache=True)(func)
+
+# Fyers option chain snapshots keyed by (symbol, expiry_timestamp) -> (fetched_at, DataFrame)
+_oc_cache = {}
+
+@functools.lru_cache(maxsize=1)
+def _oc_cache_ttl():
+    """Seconds an option chain snapshot is reused (strategy.option_chain_ttl, default 5)"""
+    try:
+        return float(load_config().get('strategy', {}).get('option_chain_ttl', 5.0))
+    except Exception:
+        return 5.0
+
+# Pooled keep-alive session for the NSE fallback; NSE only answers API calls
+# once the session carries cookies from a page visit, so it is warmed up once
+NSE_HOME_URL = "https://www.nseindia.com/option-chain"
+_SESSION = requests.Session()
+_SESSION.headers.update({
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
+    "Accept-Language": "en-US,en;q=0.9",
+    "Accept-Encoding": "gzip, deflate, br"
+})
+_SESSION.mount("https://", HTTPAdapter(
+    pool_connections=4, pool_maxsize=4,
+    max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=(502, 503, 504))
+))
+_SESSION_WARM = False
+
+def _get_nse_session():
+    """Return the shared NSE session, seeding its cookies on first use"""
+    global _SESSION_WARM
+    if not _SESSION_WARM:
+        _SESSION.get(NSE_HOME_URL, timeout=5)
+        _SESSION_WARM = True
+    return _SESSION
+
+@functools.lru_cache(maxsize=4)
+def _current_expiry(today_ord, after_close):
+    """
+    Weekly Nifty expiry for a given day, computed once per (day, after_close)
+    
+    Args:
+        today_ord (int): date.toordinal() of the current day
+        after_close (bool): True at or after 15:30 (a Thursday then rolls to next week)
+        
+    Returns:
+        tuple: (expiry_str for symbols, e.g. 25JUN19; expiry timestamp at 15:30 in epoch seconds)
+    """
+    today = datetime.date.fromordinal(today_ord)
+    
+    # Find next Thursday for weekly expiry (or current Thursday if today is Thursday)
+    days_to_thursday = (3 - today.weekday()) % 7
+    if days_to_thursday == 0 and after_close:
+        days_to_thursday = 7  # Use next Thursday
+    
+    expiry_date = today + datetime.timedelta(days=days_to_thursday)
+    
+    # Create expiry string for symbol format (e.g., 25JUN for June 2025)
+    # Format is YYMMMDD - year (2 digits), month (3 letters), day (2 digits)
+    expiry_str = f"{expiry_date.strftime('%y%b').upper()}{expiry_date.day}"
+    
+    # Convert to timestamp (epoch seconds) for API calls
+    expiry_timestamp = int(datetime.datetime(
+        expiry_date.year, expiry_date.month, expiry_date.day,
+        15, 30  # 3:30 PM expiry
+    ).timestamp())
+    
+    logging.info(f"Using expiry date: {expiry_date.strftime('%Y-%m-%d')}, symbol expiry string: {expiry_str}")
+    return expiry_str, expiry_timestamp
+
+def _expiry_now():
+    """Current (expiry_str, expiry_timestamp) via the per-day cache"""
+    now = datetime.datetime.now()
+    return _current_expiry(now.toordinal(), (now.hour, now.minute) >= (15, 30))
+
+# Per-leg quote fields kept from the Fyers option chain, in output column order
+_OC_FIELDS = ['lastPrice', 'openInterest', 'change', 'volume', 'bidPrice', 'askPrice']
+_OC_COLUMNS = ['symbol', 'strikePrice', 'option_type'] + _OC_FIELDS + ['underlyingValue']
+# Columns derived from the quotes by _derive
+_OC_DERIVED = ['mid', 'spread', 'moneyness']
+
+def _option_symbols(expiry_str, df):
+    """
+    Build Fyers option symbols for every row in one vectorized string concat
+    
+    Format is NSE:NIFTY+YY+MMM+DATE+STRIKE+OPTION_TYPE (e.g. NSE:NIFTY25JUN1319500CE)
+    
+    Args:
+        expiry_str (str): Expiry part of the symbol (e.g. 25JUN13)
+        df (DataFrame): Rows with strikePrice and option_type columns
+        
+    Returns:
+        Series: Symbol per row
+    """
+    prefix = f"NSE:NIFTY{expiry_str}"
+    return prefix + df['strikePrice'].astype('int64').astype('string') + df['option_type'].astype('string')
+
+def _build_fyers_chain_frame(options_chain_data, expiry_str, spot_price):
+    """
+    Flatten the Fyers per-strike CE/PE records into one row per option
+    
+    Args:
+        options_chain_data (list): response['d']['optionsChain'] from Fyers
+        expiry_str (str): Expiry part of the symbol (e.g. 25JUN19)
+        spot_price (float): Underlying last price
+        
+    Returns:
+        DataFrame: One row per option, ordered by strike then CE/PE
+    """
+    if not options_chain_data:
+        return pd.DataFrame(columns=_OC_COLUMNS + _OC_DERIVED)
+    
+    # One normalize call flattens the nested legs into CE.<field> / PE.<field> columns
+    flat = pd.json_normalize(options_chain_data)
+    if 'strikePrice' not in flat.columns:
+        return pd.DataFrame(columns=_OC_COLUMNS + _OC_DERIVED)
+    # Skip records without a strike (e.g. the underlying's own row) rather than
+    # failing the int cast for the whole chain
+    flat = flat[flat['strikePrice'].notna()]
+    legs = []
+    for option_type in ('CE', 'PE'):
+        leg_cols = [f"{option_type}.{field}" for field in _OC_FIELDS]
+        present = [col for col in leg_cols if col in flat.columns]
+        if not present:
+            continue
+        leg = flat.reindex(columns=leg_cols)
+        leg.columns = _OC_FIELDS
+        leg = leg[flat[present].notna().any(axis=1)].fillna(0).astype({'openInterest': 'int64', 'volume': 'int64'})
+        leg.insert(0, 'strikePrice', flat.loc[leg.index, 'strikePrice'])
+        leg.insert(1, 'option_type', option_type)
+        legs.append(leg)
+    
+    if not legs:
+        return pd.DataFrame(columns=_OC_COLUMNS + _OC_DERIVED)
+    
+    df = pd.concat(legs).sort_values(['strikePrice', 'option_type'], kind='stable').reset_index(drop=True)
+    
+    df['symbol'] = _option_symbols(expiry_str, df)
+    df['underlyingValue'] = spot_price
+    # A missing (or zero) bid/ask is no quote, so mid and spread stay NaN there
+    df['mid'], df['spread'], df['moneyness'] = _derive(
+        df['strikePrice'].to_numpy(dtype=np.float64),
+        df['bidPrice'].where(df['bidPrice'] > 0).to_numpy(dtype=np.float64),
+        df['askPrice'].where(df['askPrice'] > 0).to_numpy(dtype=np.float64),
+        float(spot_price or 0.0)
+    )
+    return df[_OC_COLUMNS + _OC_DERIVED]
+
+@_kernel
+def _derive(strike, bid, ask, spot):
+    """
+    Mid price, bid/ask spread and moneyness (strike - spot) in one fused pass
+    
+    Args:
+        strike (ndarray): float64 strike per row
+        bid (ndarray): float64 best bid per row
+        ask (ndarray): float64 best ask per row
+        spot (float): Underlying last price
+        
+    Returns:
+        tuple: (mid, spread, moneyness) arrays
+    """
+    return (bid + ask) * 0.5, ask - bid, strike - spot
+
+def get_nifty_option_chain(fyers=None):
     """
     Fetch the Nifty 50 option chain using Fyers API with the correct symbol format
     
+    Args:
+        fyers: Authenticated Fyers client (falls back to the cached client if None)
+        
     Returns:
         DataFrame: Option chain data in pandas DataFrame format with proper symbol names
     """
     try:
         # Use Fyers API client to get option chain data
         logging.info("Fetching Nifty option chain data using Fyers API")
-        fyers = get_fyers_client()
+        if fyers is None:
+            fyers = get_fyers_client()
         
         # If Fyers API client is not available, fall back to alternative method
         if not fyers:
             return _get_nifty_option_chain_fallback()
             
-        # Get current date and option expiry
-        today = datetime.datetime.now()
-        
-        # Find next Thursday for weekly expiry (or current Thursday if today is Thursday)
-        days_to_thursday = (3 - today.weekday()) % 7
-        if days_to_thursday == 0:
-            # If today is Thursday, check if market closed (after 3:30 PM)
-            if today.hour > 15 or (today.hour == 15 and today.minute >= 30):
-                days_to_thursday = 7  # Use next Thursday
-        
-        expiry_date = today + datetime.timedelta(days=days_to_thursday)
-        
-        # Create expiry string for symbol format (e.g., 25JUN for June 2025)
-        # Format is YYMMMDD - year (2 digits), month (3 letters), day (2 digits)
-        expiry_str = f"{expiry_date.strftime('%y%b').upper()}{expiry_date.day}"
-        logging.info(f"Using expiry string for symbols: {expiry_str}")
+        # Current weekly expiry (symbol part and API timestamp)
+        expiry_str, expiry_timestamp = _expiry_now()
         
-        # Convert to timestamp (epoch seconds) for API calls
-        expiry_timestamp = int(datetime.datetime(
-            expiry_date.year, expiry_date.month, expiry_date.day, 
-            15, 30  # 3:30 PM expiry
-        ).timestamp())
+        symbol = "NSE:NIFTY50-INDEX"  # Nifty index symbol
         
-        logging.info(f"Using expiry date: {expiry_date.strftime('%Y-%m-%d')}")
+        # Reuse a recent snapshot for the same underlying and expiry
+        cache_key = (symbol, expiry_timestamp)
+        now = time.monotonic()
+        hit = _oc_cache.get(cache_key)
+        if hit and now - hit[0] < _oc_cache_ttl():
+            return hit[1].copy(deep=False)
         
         try:
             # Get option chain from Fyers API
-            symbol = "NSE:NIFTY50-INDEX"  # Nifty index symbol
             data = {
                 "symbol": symbol,
                 "strikeCount": 20,  # Get 10 strikes above and below current price
                 "timestamp": expiry_timestamp
             }
             
-            logging.info(f"Requesting option chain for {symbol} with expiry {expiry_date.strftime('%Y-%m-%d')}")
+            logging.info(f"Requesting option chain for {symbol} with expiry {expiry_str}")
             response = fyers.optionchain(data=data)
             
             if response.get('s') == 'ok' and response.get('d') and 'optionsChain' in response['d']:
@@ -67,50 +241,7 @@ def get_nifty_option_chain():
                 logging.info(f"Current Nifty spot price: {spot_price}")
                 
                 # Process option chain data into a consistent format
-                processed_options = []
-                
-                for option_data in options_chain_data:
-                    strike_price = option_data.get('strikePrice', 0)
-                    
-                    # Format Fyers symbol format: NSE:NIFTY+YY+MMM+DATE+STRIKE+OPTION_TYPE
-                    # Example: NSE:NIFTY25JUN1319500CE
-                    call_symbol = f"NSE:NIFTY{expiry_str}{strike_price}CE"
-                    put_symbol = f"NSE:NIFTY{expiry_str}{strike_price}PE"
-                    
-                    # Process call option data if available
-                    if 'CE' in option_data:
-                        ce_data = option_data['CE']
-                        processed_options.append({
-                            'symbol': call_symbol,
-                            'strikePrice': strike_price,
-                            'option_type': 'CE',
-                            'lastPrice': ce_data.get('lastPrice', 0),
-                            'openInterest': ce_data.get('openInterest', 0),
-                            'change': ce_data.get('change', 0),
-                            'volume': ce_data.get('volume', 0),
-                            'bidPrice': ce_data.get('bidPrice', 0),
-                            'askPrice': ce_data.get('askPrice', 0),
-                            'underlyingValue': spot_price
-                        })
-                    
-                    # Process put option data if available
-                    if 'PE' in option_data:
-                        pe_data = option_data['PE']
-                        processed_options.append({
-                            'symbol': put_symbol,
-                            'strikePrice': strike_price,
-                            'option_type': 'PE',
-                            'lastPrice': pe_data.get('lastPrice', 0),
-                            'openInterest': pe_data.get('openInterest', 0),
-                            'change': pe_data.get('change', 0),
-                            'volume': pe_data.get('volume', 0),
-                            'bidPrice': pe_data.get('bidPrice', 0),
-                            'askPrice': pe_data.get('askPrice', 0),
-                            'underlyingValue': spot_price
-                        })
-                
-                # Convert to DataFrame
-                options_df = pd.DataFrame(processed_options)
+                options_df = _build_fyers_chain_frame(options_chain_data, expiry_str, spot_price)
                 
                 # Log a few sample symbols to verify format
                 if not options_df.empty:
@@ -119,7 +250,12 @@ def get_nifty_option_chain():
                     logging.info(f"Sample symbols - CE: {sample_ce}, PE: {sample_pe}")
                 
                 logging.info(f"Successfully fetched option chain with {len(options_df)} options")
-                return options_df
+                
+                # Drop snapshots for other expiries before caching this one
+                for key in [k for k in _oc_cache if k != cache_key]:
+                    del _oc_cache[key]
+                _oc_cache[cache_key] = (now, options_df)
+                return options_df.copy(deep=False)
             else:
                 logging.error(f"Failed to get option chain: {response}")
                 return _get_nifty_option_chain_fallback()
@@ -137,65 +273,45 @@ def _get_nifty_option_chain_fallback():
     Fallback method to fetch Nifty 50 option chain from NSE website
     This is used when Fyers API is not available or fails
     """
+    global _SESSION_WARM
     try:
         logging.info("Using fallback method to fetch option chain from NSE")
         url = "https://www.nseindia.com/api/option-chain-indices?symbol=NIFTY"
-        headers = {
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
-            "Accept-Language": "en-US,en;q=0.9",
-            "Accept-Encoding": "gzip, deflate, br"
-        }
         
-        response = requests.get(url, headers=headers)
+        response = _get_nse_session().get(url, timeout=5)
         
         if response.status_code == 200:
-            data = response.json()
+            data = orjson.loads(response.content) if orjson is not None else response.json()
             records = data['records']['data']
             
-            # Get current date for expiry calculation
-            today = datetime.datetime.now()
+            # Current weekly expiry for the symbol names
+            expiry_str, _ = _expiry_now()
             
-            # Find next Thursday for weekly expiry
-            days_to_thursday = (3 - today.weekday()) % 7
-            if days_to_thursday == 0:
-                # If today is Thursday, check if market closed
-                if today.hour > 15 or (today.hour == 15 and today.minute >= 30):
-                    days_to_thursday = 7
-                    
-            expiry_date = today + datetime.timedelta(days=days_to_thursday)
-            expiry_str = f"{expiry_date.strftime('%y%b').upper()}{expiry_date.day}"
-            
-            option_chain = []
-            for record in records:
-                strike_price = record['strikePrice']
-                
-                # Process CE (Call) data
-                if 'CE' in record:
-                    ce = record['CE']
-                    call_symbol = f"NSE:NIFTY{expiry_str}{strike_price}CE"
-                    ce.update({
-                        'symbol': call_symbol,
-                        'strikePrice': strike_price,
-                        'option_type': 'CE'
-                    })
-                    option_chain.append(ce)
-                
-                # Process PE (Put) data
-                if 'PE' in record:
-                    pe = record['PE']
-                    put_symbol = f"NSE:NIFTY{expiry_str}{strike_price}PE"
-                    pe.update({
-                        'symbol': put_symbol,
-                        'strikePrice': strike_price,
-                        'option_type': 'PE'
-                    })
-                    option_chain.append(pe)
+            # Flatten each leg's records in one normalize call, tagging strike and type
+            legs = []
+            for option_type in ('CE', 'PE'):
+                leg_records = [record for record in records if option_type in record]
+                if not leg_records:
+                    continue
+                leg = pd.json_normalize([record[option_type] for record in leg_records])
+                leg['strikePrice'] = [record['strikePrice'] for record in leg_records]
+                leg['option_type'] = option_type
+                legs.append(leg)
             
-            result_df = pd.DataFrame(option_chain)
+            result_df = (
+                pd.concat(legs, ignore_index=True)
+                .sort_values(['strikePrice', 'option_type'], kind='stable', ignore_index=True)
+                if legs else pd.DataFrame()
+            )
+            if not result_df.empty:
+                result_df['symbol'] = _option_symbols(expiry_str, result_df)
             logging.info(f"Fallback: Successfully fetched {len(result_df)} options")
             return result_df
         else:
             logging.error(f"Failed to fetch option chain: Status code {response.status_code}")
+            if response.status_code in (401, 403):
+                # Cookies expired; warm the session up again on the next call
+                _SESSION_WARM = False
             return pd.DataFrame()
             
     except Exception as e:
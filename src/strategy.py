@@ -1,72 +1,443 @@
 import pandas as pd
+import numpy as np
 import datetime
 import time
 import logging
 import schedule
 import json
 import os
-import pytz
+import csv
+import io
+import threading
+import pathlib
+from dataclasses import dataclass
+from pandas.tseries.holiday import AbstractHolidayCalendar, Holiday
+from pandas.tseries.offsets import CustomBusinessDay
+from zoneinfo import ZoneInfo
 from src.fyers_api_utils import (
-    get_fyers_client, place_market_order, modify_order, exit_position,
+    get_fyers_client, modify_order, get_current_positions,
     place_limit_order, place_sl_order, place_sl_limit_order, 
-    get_order_status, get_historical_data, start_market_data_websocket
+    get_order_status, get_historical_data, start_market_data_websocket,
+    get_async_fyers_client, aplace_market_order, aexit_position, submit_async,
+    SIDE_BUY, SIDE_SELL
 )
 from src.nse_data_new import get_nifty_option_chain
 from src.config import load_config
 from src.token_helper import ensure_valid_token
 
+try:
+    from numba import njit
+except ImportError:  # optional: strike selection falls back to a pandas groupby
+    njit = None
+
 # Setup logging
 logging.basicConfig(
     filename='logs/strategy.log',
     level=logging.INFO,
     format='%(asctime)s - %(levelname)s - %(message)s'
 )
+logger = logging.getLogger(__name__)
+
+# Indian Standard Time, resolved once at import
+_IST = ZoneInfo("Asia/Kolkata")
+
+# Fixed-date market holidays keyed by "DD/MM" (simplified check; in a
+# production system this would be the full exchange holiday list)
+HOLIDAYS = {
+    "26/01": "Republic Day",
+    "15/08": "Independence Day",
+    "02/10": "Gandhi Jayanti",
+    "25/12": "Christmas",
+}
+
+class NSEHolidayCalendar(AbstractHolidayCalendar):
+    """Exchange holidays from HOLIDAYS as a pandas holiday calendar"""
+    rules = [
+        Holiday(name, month=int(day_month[3:]), day=int(day_month[:2]))
+        for day_month, name in HOLIDAYS.items()
+    ]
+
+def trading_days(year):
+    """
+    Build the set of NSE trading dates in a year (weekdays minus holidays)
+    
+    Args:
+        year (int): Calendar year
+        
+    Returns:
+        frozenset: datetime.date objects the market is open on
+    """
+    business_days = pd.bdate_range(
+        f"{year}-01-01", f"{year}-12-31",
+        freq=CustomBusinessDay(calendar=NSEHolidayCalendar())
+    )
+    return frozenset(business_days.date)
+
+# Price levels are computed in integer paise so comparisons don't flip on float noise
+PAISE = 100
+
+def to_paise(price):
+    """Convert a rupee premium to integer paise"""
+    return int(round(price * PAISE))
+
+def format_trade(index, trade):
+    """
+    Render one trade history record as a daily report block
+    
+    Args:
+        index (int): 1-based position of the trade in the report
+        trade (dict): Trade history record
+        
+    Returns:
+        str: Report lines for the trade, ending with a separator line
+    """
+    status = trade.get('status', 'UNKNOWN')
+    lines = [
+        f"Trade #{index}:",
+        f"  Symbol: {trade.get('symbol', 'N/A')}",
+        f"  Entry Time: {trade.get('entry_time', 'N/A')}",
+        f"  Entry Price: {trade.get('entry_price', 'N/A')}",
+        f"  Quantity: {trade.get('quantity', 'N/A')}",
+        f"  Status: {status}"
+    ]
+    
+    if status == 'CLOSED':
+        pnl = trade.get('pnl', 0)
+        pnl_str = f"{pnl:.2f}" if pnl is not None else "N/A"
+        lines.extend([
+            f"  Exit Time: {trade.get('exit_time', 'N/A')}",
+            f"  Exit Price: {trade.get('exit_price', 'N/A')}",
+            f"  P&L: {pnl_str}",
+            f"  Exit Reason: {trade.get('exit_reason', 'N/A')}"
+        ])
+    
+    lines.append("-" * 30)
+    return "\n".join(lines)
+
+def _highest_oi_rows(oi, is_put):
+    """
+    Single pass over the chain for the highest-OI put and call rows
+    
+    NaN open interest is skipped and ties go to the first row, as with idxmax.
+    
+    Args:
+        oi (ndarray): float64 open interest per row
+        is_put (ndarray): bool, True for PE rows and False for CE rows
+        
+    Returns:
+        tuple: (put_row, call_row), -1 where that option type has no rows
+    """
+    put_row = -1
+    call_row = -1
+    put_best = 0.0
+    call_best = 0.0
+    for i in range(oi.shape[0]):
+        value = oi[i]
+        if value != value:
+            continue
+        if is_put[i]:
+            if put_row < 0 or value > put_best:
+                put_row = i
+                put_best = value
+        elif call_row < 0 or value > call_best:
+            call_row = i
+            call_best = value
+    return put_row, call_row
+
+# Compiled (and cached on disk) when numba is installed
+_highest_oi_rows_jit = njit(cache=True)(_highest_oi_rows) if njit is not None else None
+
+def select_strikes(option_chain):
+    """
+    Row positions of the highest-OI put and call in the option chain
+    
+    Uses the Numba kernel when available, otherwise a vectorized groupby/idxmax.
+    
+    Args:
+        option_chain (DataFrame): Chain with option_type and openInterest columns
+        
+    Returns:
+        tuple: (put_row, call_row), -1 where that option type has no rows
+    """
+    oi = option_chain['openInterest'].to_numpy(dtype=np.float64)
+    is_put = option_chain['option_type'].to_numpy() == 'PE'
+    if _highest_oi_rows_jit is not None:
+        return _highest_oi_rows_jit(oi, is_put)
+    
+    valid = ~np.isnan(oi)
+    rows = pd.Series(oi[valid], index=np.flatnonzero(valid)).groupby(is_put[valid]).idxmax()
+    return int(rows.get(True, -1)), int(rows.get(False, -1))
+
+# Seconds to wait for an order acknowledgement from the async client
+ORDER_TIMEOUT = 10
+# Minimum seconds between position checks while an order's state is unknown
+ORDER_RECHECK_INTERVAL = 2
+
+TRADE_HISTORY_FILE = 'logs/trade_history.csv'
+REPORT_DIR = pathlib.Path('logs/reports')
+TRADE_HISTORY_FIELDS = [
+    'date', 'symbol', 'entry_time', 'entry_price', 'quantity', 'status',
+    'exit_price', 'pnl', 'exit_reason', 'paper_trade', 'exit_time', 'pnl_pct'
+]
+
+# Numeric trade history columns and their types; everything else stays a string
+_TRADE_NUMERIC_FIELDS = {
+    'entry_price': float, 'exit_price': float, 'pnl': float, 'pnl_pct': float,
+    'quantity': int,
+}
+
+def _parse_trade_row(row):
+    """Convert the numeric fields of a trade history CSV row in place (blank -> None)"""
+    for field, cast in _TRADE_NUMERIC_FIELDS.items():
+        value = row.get(field)
+        if value is not None:
+            row[field] = cast(float(value)) if value != '' else None
+    return row
+
+@dataclass(slots=True)
+class ActiveTrade:
+    """The single open position managed by the strategy"""
+    symbol: str
+    strike: int
+    option_type: str
+    quantity: int
+    entry_price: float
+    entry_time: datetime.datetime
+    stoploss_paise: int
+    target_paise: int
+    exit_time: datetime.datetime
+    
+    @property
+    def stoploss(self):
+        return self.stoploss_paise / PAISE
+    
+    @property
+    def target(self):
+        return self.target_paise / PAISE
 
 class OpenInterestStrategy:
+    __slots__ = (
+        'config', 'fyers', 'active_trade', 'highest_put_oi_strike', 'highest_call_oi_strike',
+        'highest_put_oi_symbol', 'highest_call_oi_symbol', 'put_premium_at_9_20',
+        'call_premium_at_9_20', 'put_breakout_level', 'call_breakout_level',
+        '_put_break_paise', '_call_break_paise', 'entry_time',
+        'order_id', 'stop_loss_order_id', 'target_order_id', 'data_socket', 'trade_history',
+        '_trade_lock', '_breakout_event', '_stop', '_pe_prices', '_ce_prices',
+        '_open_trades_index', '_trading_days', '_trading_year',
+        '_report_dir', '_pending_order',
+    )
+    
+    # Market hours in IST
+    MARKET_OPEN_TIME = datetime.time(9, 15)
+    MARKET_CLOSE_TIME = datetime.time(15, 30)
+    # Time of the daily open interest analysis (IST, "HH:MM" for schedule)
+    ANALYSIS_TIME = "09:20"
+    
     def __init__(self):
         self.config = load_config()
-        self.fyers = get_fyers_client()
+        self.fyers = get_fyers_client(verify=True)
         self.active_trade = None
         self.highest_put_oi_strike = None
         self.highest_call_oi_strike = None
+        self.highest_put_oi_symbol = None
+        self.highest_call_oi_symbol = None
         self.put_premium_at_9_20 = None
         self.call_premium_at_9_20 = None
+        self.put_breakout_level = None
+        self.call_breakout_level = None
+        self._put_break_paise = None
+        self._call_break_paise = None
         self.entry_time = None
         self.order_id = None
         self.stop_loss_order_id = None
         self.target_order_id = None
         self.data_socket = None
         self.trade_history = []
+        # Entries can come from websocket ticks (consumer thread), the REST poll or
+        # order callbacks on the event loop thread; re-entrant because a callback
+        # for an already-finished order runs inline in the submitting thread
+        self._trade_lock = threading.RLock()
+        self._breakout_event = threading.Event()
+        # Set at market close so tick callbacks and the breakout poll stand down
+        self._stop = threading.Event()
+        # Last prices by strike for puts and calls, refreshed from each chain snapshot
+        self._pe_prices = {}
+        self._ce_prices = {}
+        # Open trade records keyed by (symbol, entry_time) for O(1) lookup on exit
+        self._open_trades_index = {}
+        # Trading calendar for the current IST year, rebuilt when the year rolls over
+        self._trading_year = self.get_ist_datetime().year
+        self._trading_days = trading_days(self._trading_year)
+        # Daily reports directory, created once up front
+        self._report_dir = REPORT_DIR
+        self._report_dir.mkdir(parents=True, exist_ok=True)
+        # Order whose acknowledgement timed out; no new order is sent until the
+        # broker's positions show whether it went through
+        self._pending_order = None
         
         # Load existing trade history if available
         try:
-            if os.path.exists('logs/trade_history.csv'):
-                self.trade_history = pd.read_csv('logs/trade_history.csv').to_dict('records')
-                logging.info(f"Loaded {len(self.trade_history)} historical trades")
+            if os.path.exists(TRADE_HISTORY_FILE):
+                with open(TRADE_HISTORY_FILE, newline='') as f:
+                    self.trade_history = [_parse_trade_row(row) for row in csv.DictReader(f)]
+                logger.info(f"Loaded {len(self.trade_history)} historical trades")
         except Exception as e:
-            logging.warning(f"Could not load trade history: {str(e)}")
+            logger.warning(f"Could not load trade history: {str(e)}")
         
+    def _refresh_prices(self, option_chain=None):
+        """
+        Refresh self._pe_prices / self._ce_prices ({strike: lastPrice}) from one chain snapshot
+        
+        Args:
+            option_chain (DataFrame): Snapshot to use; fetched (via the option chain
+                                      module's TTL cache) when None
+        """
+        if option_chain is None:
+            option_chain = get_nifty_option_chain(self.fyers)
+        # Split by option type once per snapshot so lookups never touch option_type
+        option_type = option_chain['option_type'].to_numpy()
+        strikes = option_chain['strikePrice'].to_numpy()
+        prices = option_chain['lastPrice'].to_numpy()
+        is_pe = option_type == 'PE'
+        is_ce = option_type == 'CE'
+        self._pe_prices = dict(zip(strikes[is_pe], prices[is_pe]))
+        self._ce_prices = dict(zip(strikes[is_ce], prices[is_ce]))
+    
+    async def _asubmit_order(self, symbol, qty, side, closing=False):
+        """Send a market order through the async client on the shared event loop"""
+        afyers = get_async_fyers_client(check_token=False)
+        if closing:
+            return await aexit_position(afyers, symbol, qty, side)
+        return await aplace_market_order(afyers, symbol, qty, side)
+    
+    def _submit_order(self, symbol, qty, side, closing=False, price=None, exit_type=None):
+        """
+        Send an order on the shared event loop without waiting for the broker
+        
+        The tick consumer and scheduler threads return straight away; the order is
+        tracked in self._pending_order and its response is handled by
+        _on_order_done. No further order is sent until it settles.
+        
+        Args:
+            symbol: Option symbol
+            qty: Quantity
+            side: SIDE_BUY or SIDE_SELL
+            closing (bool): True for the exit of the active trade
+            price: Entry or exit premium recorded for the trade
+            exit_type: Exit reason (closing orders only)
+        """
+        future = submit_async(self._asubmit_order(symbol, qty, side, closing))
+        self._pending_order = {
+            'future': future, 'symbol': symbol, 'qty': qty, 'closing': closing,
+            'price': price, 'exit_type': exit_type, 'time': self.get_ist_datetime(),
+            'submitted_at': time.monotonic(), 'checked_at': 0.0, 'unknown': False
+        }
+        future.add_done_callback(self._on_order_done)
+    
+    def _on_order_done(self, future):
+        """Order future callback (event loop thread): book the fill or release the order slot"""
+        with self._trade_lock:
+            pending = self._pending_order
+            if pending is None or pending['future'] is not future:
+                return
+            symbol = pending['symbol']
+            if future.cancelled() or future.exception() is not None:
+                # The request may or may not have reached the exchange
+                logger.error(f"Order for {symbol} did not complete - order state unknown")
+                pending['unknown'] = True
+                return
+            
+            response = future.result()
+            if not response or response.get('s') != 'ok':
+                logger.error(f"{'Exit' if pending['closing'] else 'Order placement'} failed: {response}")
+                self._pending_order = None
+                return
+            
+            self._pending_order = None
+            if pending['closing']:
+                self._record_exit(pending['exit_type'], pending['price'], pending['time'])
+            else:
+                self.order_id = response.get('id')
+                self._record_entry(symbol, pending['qty'], pending['price'])
+    
+    def _net_qty(self, symbol):
+        """Broker's net position quantity in symbol, or None if positions couldn't be fetched"""
+        positions = get_current_positions(self.fyers)
+        if not positions or positions.get('s') != 'ok':
+            return None
+        return sum(
+            position.get('netQty', 0)
+            for position in positions.get('netPositions', [])
+            if position.get('symbol') == symbol
+        )
+    
+    def _resolve_pending_order(self):
+        """
+        Check whether a new order may be sent
+        
+        An order still in flight blocks new orders until _on_order_done handles
+        it. One with no acknowledgement after ORDER_TIMEOUT (or that failed in
+        transit) is cancelled and settled from the broker's positions: an entry
+        that shows up as an open position becomes the active trade, an exit whose
+        position is flat closes it. Call with self._trade_lock held.
+        
+        Returns:
+            bool: True once no order is in flight or in an unknown state
+        """
+        pending = self._pending_order
+        if pending is None:
+            return True
+        if not pending['unknown']:
+            future = pending['future']
+            if future.done() or time.monotonic() - pending['submitted_at'] < ORDER_TIMEOUT:
+                return False
+            logger.error(f"No acknowledgement for {pending['symbol']} order within {ORDER_TIMEOUT}s - order state unknown")
+            pending['unknown'] = True
+            future.cancel()
+        if time.monotonic() - pending['checked_at'] < ORDER_RECHECK_INTERVAL:
+            return False
+        
+        pending['checked_at'] = time.monotonic()
+        net_qty = self._net_qty(pending['symbol'])
+        if net_qty is None:
+            logger.warning(f"Order state for {pending['symbol']} still unknown - holding off new orders")
+            return False
+        
+        self._pending_order = None
+        if pending['closing']:
+            if net_qty == 0 and self.active_trade:
+                logger.info(f"Timed-out exit order for {pending['symbol']} was filled")
+                self._record_exit(pending['exit_type'], pending['price'], pending['time'])
+        elif net_qty > 0 and not self.active_trade:
+            logger.info(f"Timed-out entry order for {pending['symbol']} was filled")
+            self._record_entry(pending['symbol'], pending['qty'], pending['price'])
+        return True
+    
     def initialize_day(self):
         """Reset variables for a new trading day"""
         # Check for valid token before starting the trading day
         try:
             access_token = ensure_valid_token()
             if access_token:
-                self.fyers = get_fyers_client(check_token=False)  # Token already checked
-                logging.info("Authentication verified for today's trading session")
+                self.fyers = get_fyers_client(check_token=False, verify=True)  # Token already checked
+                logger.info("Authentication verified for today's trading session")
             else:
-                logging.error("Failed to obtain valid access token for today's session")
+                logger.error("Failed to obtain valid access token for today's session")
                 return False
                 
             # Close any existing websocket connection
             if self.data_socket:
                 try:
                     self.data_socket.close_connection()
-                    logging.info("Closed previous websocket connection")
+                    logger.info("Closed previous websocket connection")
                 except:
                     pass
                     
             self.data_socket = None
+            self._breakout_event.clear()
+            self._stop.clear()
+            self._pe_prices = {}
+            self._ce_prices = {}
             
             # Reset trading variables
             self.active_trade = None
@@ -79,115 +450,180 @@ class OpenInterestStrategy:
             self.stop_loss_order_id = None
             self.target_order_id = None
             self.trade_history = []
+            self._open_trades_index = {}
             
-            logging.info("Strategy initialized for a new trading day")
+            logger.info("Strategy initialized for a new trading day")
             return True
             
         except Exception as e:
-            logging.error(f"Error initializing day: {str(e)}")
+            logger.error(f"Error initializing day: {str(e)}")
             return False
 
-    def identify_high_oi_strikes(self):
+    def _is_trading_day(self, ist_now):
+        """
+        Check whether the market is open on ist_now's date
+        
+        Args:
+            ist_now (datetime): Current IST time
+            
+        Returns:
+            bool: False on weekends and holidays
+        """
+        today = ist_now.date()
+        if today.year != self._trading_year:
+            self._trading_year = today.year
+            self._trading_days = trading_days(today.year)
+        return today in self._trading_days
+    
+    def identify_high_oi_strikes(self, ist_now=None):
         """Identify strikes with highest open interest at 9:20 AM"""
         try:
             # Check if markets are open today
-            today = datetime.datetime.now()
-            if today.weekday() > 4:  # Saturday or Sunday
-                logging.warning("Markets are closed today (weekend). Skipping analysis.")
-                return False
-            
-            # Check if it's a market holiday (simplified check)
-            # In a production system, you would have a list of market holidays
-            holiday_names = ["Republic Day", "Independence Day", "Gandhi Jayanti", "Christmas"]
-            holiday_dates = ["26/01", "15/08", "02/10", "25/12"]
-            current_date = today.strftime("%d/%m")
-            
-            if current_date in holiday_dates:
-                holiday_name = holiday_names[holiday_dates.index(current_date)]
-                logging.warning(f"Markets are closed today ({holiday_name}). Skipping analysis.")
+            if not self._is_trading_day(ist_now or self.get_ist_datetime()):
+                logger.warning("Markets are closed today. Skipping analysis.")
                 return False
                 
             # Get Nifty option chain data with proper expiry
-            logging.info("Fetching option chain data for analysis...")
-            option_chain = get_nifty_option_chain()
+            logger.info("Fetching option chain data for analysis...")
+            option_chain = get_nifty_option_chain(self.fyers)
             
             if option_chain.empty:
-                logging.error("Empty option chain returned - markets may be closed or there's a connection issue")
+                logger.error("Empty option chain returned - markets may be closed or there's a connection issue")
                 return False
+            
+            # Seed the per-type price dicts from the same snapshot
+            self._refresh_prices(option_chain)
                 
-            # Find the put strike with highest OI
-            put_data = option_chain[option_chain['option_type'] == 'PE']
-            if put_data.empty:
-                logging.error("No put options found in option chain")
+            # Highest-OI row per option type (Numba pass, or groupby/idxmax without numba)
+            put_row, call_row = select_strikes(option_chain)
+            
+            if put_row < 0:
+                logger.error("No put options found in option chain")
                 return False
-                
-            self.highest_put_oi_strike = put_data.loc[put_data['openInterest'].idxmax()]['strikePrice']
-            self.put_premium_at_9_20 = put_data[put_data['strikePrice'] == self.highest_put_oi_strike]['lastPrice'].values[0]
-            self.highest_put_oi_symbol = put_data[put_data['strikePrice'] == self.highest_put_oi_strike]['symbol'].values[0]
-            
-            # Find the call strike with highest OI
-            call_data = option_chain[option_chain['option_type'] == 'CE']
-            if call_data.empty:
-                logging.error("No call options found in option chain")
+            if call_row < 0:
+                logger.error("No call options found in option chain")
                 return False
                 
-            self.highest_call_oi_strike = call_data.loc[call_data['openInterest'].idxmax()]['strikePrice']
-            self.call_premium_at_9_20 = call_data[call_data['strikePrice'] == self.highest_call_oi_strike]['lastPrice'].values[0]
-            self.highest_call_oi_symbol = call_data[call_data['strikePrice'] == self.highest_call_oi_strike]['symbol'].values[0]
+            put = option_chain.iloc[put_row]
+            call = option_chain.iloc[call_row]
+            self.highest_put_oi_strike = put['strikePrice']
+            self.put_premium_at_9_20 = put['lastPrice']
+            self.highest_put_oi_symbol = put['symbol']
             
-            logging.info(f"Highest PUT OI Strike: {self.highest_put_oi_strike}, Premium: {self.put_premium_at_9_20}")
-            logging.info(f"Highest CALL OI Strike: {self.highest_call_oi_strike}, Premium: {self.call_premium_at_9_20}")
+            self.highest_call_oi_strike = call['strikePrice']
+            self.call_premium_at_9_20 = call['lastPrice']
+            self.highest_call_oi_symbol = call['symbol']
+            
+            logger.info(f"Highest PUT OI Strike: {self.highest_put_oi_strike}, Premium: {self.put_premium_at_9_20}")
+            logger.info(f"Highest CALL OI Strike: {self.highest_call_oi_strike}, Premium: {self.call_premium_at_9_20}")
             
             # Calculate breakout levels (10% increase)
-            self.put_breakout_level = round(self.put_premium_at_9_20 * 1.10, 1)
-            self.call_breakout_level = round(self.call_premium_at_9_20 * 1.10, 1)
+            self._put_break_paise = to_paise(self.put_premium_at_9_20) * 11 // 10
+            self._call_break_paise = to_paise(self.call_premium_at_9_20) * 11 // 10
+            self.put_breakout_level = self._put_break_paise / PAISE
+            self.call_breakout_level = self._call_break_paise / PAISE
+            
+            logger.info(f"PUT Breakout Level: {self.put_breakout_level}")
+            logger.info(f"CALL Breakout Level: {self.call_breakout_level}")
             
-            logging.info(f"PUT Breakout Level: {self.put_breakout_level}")
-            logging.info(f"CALL Breakout Level: {self.call_breakout_level}")
+            # Stream the two selected options so breakouts are detected on push
+            self._start_breakout_socket()
             
             return True
         except Exception as e:
-            logging.error(f"Error identifying high OI strikes: {str(e)}")
+            logger.error(f"Error identifying high OI strikes: {str(e)}")
             return False
     
+    def _start_breakout_socket(self):
+        """Subscribe to live ticks for the highest-OI put and call options"""
+        if self.data_socket:
+            try:
+                self.data_socket.close_connection()
+            except Exception:
+                pass
+        self.data_socket = start_market_data_websocket(
+            [self.highest_put_oi_symbol, self.highest_call_oi_symbol],
+            on_tick=self._on_tick
+        )
+    
+    def _stop_monitoring(self):
+        """Stop reacting to ticks and close the breakout websocket at market close"""
+        self._stop.set()
+        if self.data_socket:
+            try:
+                self.data_socket.close_connection()
+                logger.info("Closed breakout websocket at market close")
+            except Exception:
+                pass
+            self.data_socket = None
+    
+    def _socket_connected(self):
+        """True if the breakout websocket is up and pushing ticks"""
+        try:
+            return bool(self.data_socket) and self.data_socket.is_connected()
+        except Exception:
+            return False
+    
+    def _on_tick(self, message):
+        """Websocket tick callback: enter on a premium breakout, manage the open position"""
+        if self._stop.is_set() or not isinstance(message, dict) or 'ltp' not in message:
+            return
+        
+        symbol = message.get('symbol')
+        ltp = float(message['ltp'])
+        if symbol == self.highest_put_oi_symbol:
+            label, break_paise = "PUT", self._put_break_paise
+        elif symbol == self.highest_call_oi_symbol:
+            label, break_paise = "CALL", self._call_break_paise
+        else:
+            return
+        
+        if self.active_trade:
+            if symbol == self.active_trade.symbol:
+                self.manage_position(ltp)
+        elif to_paise(ltp) >= break_paise:
+            self._enter_breakout(label, symbol, ltp)
+    
+    def _enter_breakout(self, label, symbol, premium):
+        """Execute a breakout entry once, whichever path (tick or poll) sees it first"""
+        with self._trade_lock:
+            if not self._resolve_pending_order() or self.active_trade:
+                return None
+            self.entry_time = self.get_ist_datetime()
+            logger.info(f"{label} BREAKOUT DETECTED: {symbol} at premium {premium}")
+            return self.execute_trade(symbol, SIDE_BUY, premium)
+    
     def monitor_for_breakout(self):
         """Monitor option premiums for breakout (10% increase)"""
         try:
-            # Only monitor if we don't have an active trade
-            if self.active_trade:
+            # Only monitor if we don't have an active trade and the market is open
+            if self.active_trade or self._stop.is_set():
                 return
             
-            # Get current option chain data
-            option_chain = get_nifty_option_chain()
+            # Entries are driven by websocket ticks while the socket is live;
+            # polling the option chain is only the fallback
+            if self._socket_connected():
+                return self.active_trade if self._breakout_event.is_set() else None
             
-            # Check for PUT breakout
-            current_put_premium = option_chain[(option_chain['strikePrice'] == self.highest_put_oi_strike) & 
-                                             (option_chain['option_type'] == 'PE')]['lastPrice'].values[0]
+            # Current last prices of the two selected strikes
+            self._refresh_prices()
+            put_ltp = float(self._pe_prices[self.highest_put_oi_strike])
+            call_ltp = float(self._ce_prices[self.highest_call_oi_strike])
             
-            # Check for CALL breakout
-            current_call_premium = option_chain[(option_chain['strikePrice'] == self.highest_call_oi_strike) & 
-                                              (option_chain['option_type'] == 'CE')]['lastPrice'].values[0]
-            
-            logging.info(f"Current PUT premium: {current_put_premium}, Breakout level: {self.put_breakout_level}")
-            logging.info(f"Current CALL premium: {current_call_premium}, Breakout level: {self.call_breakout_level}")
+            logger.debug("Current PUT %.2f vs breakout %.2f", put_ltp, self.put_breakout_level)
+            logger.debug("Current CALL %.2f vs breakout %.2f", call_ltp, self.call_breakout_level)
             
             # Check for PUT breakout
-            if current_put_premium >= self.put_breakout_level:
-                self.entry_time = self.get_ist_datetime()
-                symbol = self.highest_put_oi_symbol
-                logging.info(f"PUT BREAKOUT DETECTED: {symbol} at premium {current_put_premium}")
-                return self.execute_trade(symbol, "BUY", current_put_premium)
+            if to_paise(put_ltp) >= self._put_break_paise:
+                return self._enter_breakout("PUT", self.highest_put_oi_symbol, put_ltp)
                 
             # Check for CALL breakout
-            if current_call_premium >= self.call_breakout_level:
-                self.entry_time = self.get_ist_datetime()
-                symbol = self.highest_call_oi_symbol
-                logging.info(f"CALL BREAKOUT DETECTED: {symbol} at premium {current_call_premium}")
-                return self.execute_trade(symbol, "BUY", current_call_premium)
+            if to_paise(call_ltp) >= self._call_break_paise:
+                return self._enter_breakout("CALL", self.highest_call_oi_symbol, call_ltp)
                 
             return None
         except Exception as e:
-            logging.error(f"Error monitoring for breakout: {str(e)}")
+            logger.error(f"Error monitoring for breakout: {str(e)}")
             return None
     
     def execute_trade(self, symbol, side, entry_price):
@@ -200,110 +636,112 @@ class OpenInterestStrategy:
             notional_value = entry_price * qty
             
             # Log trade setup info
-            logging.info(f"Paper Trading Setup - Symbol: {symbol}, Price: {entry_price}")
-            logging.info(f"Trade Size: {qty} lots, Notional Value: {notional_value}")
+            logger.info(f"Paper Trading Setup - Symbol: {symbol}, Price: {entry_price}")
+            logger.info(f"Trade Size: {qty} lots, Notional Value: {notional_value}")
             
-            # Place order using Fyers API (or simulate for paper trading)
-            order_response = place_market_order(self.fyers, symbol, qty, side)
-            
-            if order_response and order_response.get('s') == 'ok':
-                self.order_id = order_response.get('id')
-                # Calculate the exit time (30 min after entry)
-                exit_time = self.entry_time + datetime.timedelta(minutes=30)
-                
-                self.active_trade = {
-                    'symbol': symbol,
-                    'quantity': qty,
-                    'entry_price': entry_price,
-                    'entry_time': self.entry_time,
-                    'stoploss': round(entry_price * 0.8, 1),  # 20% stoploss
-                    'target': round(entry_price * 1.2, 1),    # 20% profit (1:2 risk-reward)
-                    'exit_time': exit_time  # 30-min time limit
-                }
-                
-                # Log trade details with better formatting
-                logging.info(f"=== NEW PAPER TRADE EXECUTED ===")
-                logging.info(f"Symbol: {symbol}")
-                logging.info(f"Entry Price: {entry_price}")
-                logging.info(f"Quantity: {qty} lots")
-                logging.info(f"Entry Time: {self.entry_time.strftime('%Y-%m-%d %H:%M:%S')}")
-                logging.info(f"Stoploss: {self.active_trade['stoploss']}")
-                logging.info(f"Target: {self.active_trade['target']}")
-                logging.info(f"Exit Time Limit: {self.active_trade['exit_time'].strftime('%Y-%m-%d %H:%M:%S')}")
-                logging.info(f"========================")
-                
-                # Store trade information for reporting
-                self.trade_history.append({
-                    'date': self.entry_time.strftime('%Y-%m-%d'),
-                    'symbol': symbol,
-                    'entry_time': self.entry_time.strftime('%H:%M:%S'),
-                    'entry_price': entry_price,
-                    'quantity': qty,
-                    'status': 'OPEN',
-                    'exit_price': None,
-                    'pnl': None,
-                    'exit_reason': None,
-                    'paper_trade': True  # Mark as paper trade
-                })
-                
-                return self.active_trade
-            else:
-                logging.error(f"Order placement failed: {order_response}")
-                return None
+            # Place order using Fyers API; the trade is booked by _on_order_done
+            self._submit_order(symbol, qty, side, price=entry_price)
+            return None
         except Exception as e:
-            logging.error(f"Error executing trade: {str(e)}")
+            logger.error(f"Error executing trade: {str(e)}")
             return None
     
-    def manage_position(self):
-        """Manage active position and check for exit conditions with enhanced reporting"""
-        if not self.active_trade:
+    def _record_entry(self, symbol, qty, entry_price):
+        """Set up the active trade and its history record for a filled entry order"""
+        # Calculate the exit time (30 min after entry)
+        exit_time = self.entry_time + datetime.timedelta(minutes=30)
+        
+        # Remember which leg was bought so exits can look its price up directly
+        if symbol == self.highest_put_oi_symbol:
+            strike, option_type = self.highest_put_oi_strike, 'PE'
+        else:
+            strike, option_type = self.highest_call_oi_strike, 'CE'
+        
+        entry_paise = to_paise(entry_price)
+        self.active_trade = ActiveTrade(
+            symbol=symbol,
+            strike=strike,
+            option_type=option_type,
+            quantity=qty,
+            entry_price=entry_price,
+            entry_time=self.entry_time,
+            stoploss_paise=entry_paise * 8 // 10,  # 20% stoploss
+            target_paise=entry_paise * 12 // 10,   # 20% profit (1:2 risk-reward)
+            exit_time=exit_time  # 30-min time limit
+        )
+        
+        # Log trade details with better formatting
+        logger.info(f"=== NEW PAPER TRADE EXECUTED ===")
+        logger.info(f"Symbol: {symbol}")
+        logger.info(f"Entry Price: {entry_price}")
+        logger.info(f"Quantity: {qty} lots")
+        logger.info(f"Entry Time: {self.entry_time.strftime('%Y-%m-%d %H:%M:%S')}")
+        logger.info(f"Stoploss: {self.active_trade.stoploss}")
+        logger.info(f"Target: {self.active_trade.target}")
+        logger.info(f"Exit Time Limit: {self.active_trade.exit_time.strftime('%Y-%m-%d %H:%M:%S')}")
+        logger.info(f"========================")
+        
+        # Store trade information for reporting
+        entry_time_str = self.entry_time.strftime('%H:%M:%S')
+        trade_record = {
+            'date': self.entry_time.strftime('%Y-%m-%d'),
+            'symbol': symbol,
+            'entry_time': entry_time_str,
+            'entry_price': entry_price,
+            'quantity': qty,
+            'status': 'OPEN',
+            'exit_price': None,
+            'pnl': None,
+            'exit_reason': None,
+            'paper_trade': True  # Mark as paper trade
+        }
+        self.trade_history.append(trade_record)
+        self._open_trades_index[(symbol, entry_time_str)] = trade_record
+        self._breakout_event.set()
+        
+        return self.active_trade
+    
+    def schedule_jobs(self):
+        """Register the daily open interest analysis at ANALYSIS_TIME IST with the scheduler"""
+        return schedule.every().day.at(self.ANALYSIS_TIME, "Asia/Kolkata").do(self._scheduled_analysis)
+    
+    def _scheduled_analysis(self):
+        """Scheduled 9:20 job: identify the high OI strikes on trading days"""
+        ist_now = self.get_ist_datetime()
+        if self._is_trading_day(ist_now):
+            logger.info("Performing 9:20 AM IST analysis...")
+            self.identify_high_oi_strikes(ist_now)
+    
+    def manage_position(self, current_price=None):
+        """
+        Manage active position and check for exit conditions with enhanced reporting
+        
+        Called from websocket ticks with the held option's last price, or from
+        run_strategy without one, in which case the price comes from the option chain.
+        """
+        # Ticks and the scheduler can both get here; only one may exit the trade
+        with self._trade_lock:
+            return self._manage_position(current_price)
+    
+    def _manage_position(self, current_price):
+        if not self._resolve_pending_order() or not self.active_trade:
             return
             
         try:
             # Get current market data
-            symbol = self.active_trade['symbol']
-            entry_price = self.active_trade['entry_price']
-            quantity = self.active_trade['quantity']
+            symbol = self.active_trade.symbol
+            entry_price = self.active_trade.entry_price
+            quantity = self.active_trade.quantity
             current_time = self.get_ist_datetime()
-            option_chain = get_nifty_option_chain()
-            
-            # Parse strike and option type from symbol
-            # Extract strike price from symbol (format: NSE:NIFTY25JUN19500CE)
-            # The symbol format should be standardized in our get_nifty_option_chain function
-            symbol_parts = symbol.split(':')[1]  # Remove 'NSE:'
-            strike = None
-            option_type = 'CE' if symbol.endswith('CE') else 'PE'
-            
-            # Parse the strike price from the symbol
-            # It's a fixed width field in Fyers API format
-            numeric_part = ''.join(filter(str.isdigit, symbol_parts))
-            # Skip the date part (YYMMMDD) which should be the first 5-7 characters
-            # and get the strike price
-            strike = int(numeric_part[5:]) if len(numeric_part) > 5 else None
-            
-            if not strike:
-                logging.error(f"Could not parse strike price from symbol: {symbol}")
-                # Try to get the last traded price directly
-                current_price = 0
-                for idx, row in option_chain.iterrows():
-                    if row['symbol'] == symbol:
-                        current_price = row['lastPrice']
-                        break
-            else:
-                # Get current price from option chain
-                matching_options = option_chain[(option_chain['strikePrice'] == strike) & 
-                                             (option_chain['option_type'] == option_type)]
-                
-                if matching_options.empty:
-                    logging.error(f"Could not find option with strike {strike} and type {option_type}")
-                    # Try direct symbol match
-                    matching_options = option_chain[option_chain['symbol'] == symbol]
-                    
-                if not matching_options.empty:
-                    current_price = matching_options['lastPrice'].values[0]
-                else:
-                    logging.error("Could not find the current option price")
-                    return None
+            
+            # Current price of the held leg from the per-type price dicts
+            if current_price is None:
+                self._refresh_prices()
+                leg_prices = self._pe_prices if self.active_trade.option_type == 'PE' else self._ce_prices
+                current_price = leg_prices.get(self.active_trade.strike)
+            if current_price is None:
+                logger.error(f"Could not find the current option price for {symbol}")
+                return None
             
             # Calculate current P&L
             entry_value = entry_price * quantity
@@ -311,177 +749,175 @@ class OpenInterestStrategy:
             unrealized_pnl = current_value - entry_value
             unrealized_pnl_pct = (unrealized_pnl / entry_value) * 100 if entry_value > 0 else 0
             
-            logging.info(f"Managing position: {symbol}, Current price: {current_price}, " +
-                        f"P&L: {unrealized_pnl:.2f} ({unrealized_pnl_pct:.2f}%)")
+            logger.debug("Managing position: %s, Current price: %s, P&L: %.2f (%.2f%%)",
+                         symbol, current_price, unrealized_pnl, unrealized_pnl_pct)
             
             # Check exit conditions:
             exit_type = None
             exit_price = None
             
+            price_paise = to_paise(current_price)
+            
             # 1. Stoploss hit
-            if current_price <= self.active_trade['stoploss']:
+            if price_paise <= self.active_trade.stoploss_paise:
                 exit_type = "STOPLOSS"
                 exit_price = current_price
-                logging.info(f"STOPLOSS HIT: Exiting {symbol} at {current_price}")
+                logger.info(f"STOPLOSS HIT: Exiting {symbol} at {current_price}")
                 
             # 2. Target hit
-            elif current_price >= self.active_trade['target']:
+            elif price_paise >= self.active_trade.target_paise:
                 exit_type = "TARGET"
                 exit_price = current_price
-                logging.info(f"TARGET HIT: Exiting {symbol} at {current_price}")
+                logger.info(f"TARGET HIT: Exiting {symbol} at {current_price}")
                 
             # 3. Time-based exit
-            elif current_time >= self.active_trade['exit_time']:
+            elif current_time >= self.active_trade.exit_time:
                 exit_type = "TIME"
                 exit_price = current_price
-                logging.info(f"TIME EXIT: Exiting {symbol} at {current_price}")
+                logger.info(f"TIME EXIT: Exiting {symbol} at {current_price}")
             
             # Process exit if conditions are met
             if exit_type:
-                # Execute the exit trade
-                exit_response = exit_position(self.fyers, self.active_trade['symbol'], quantity, "SELL")
-                
-                if exit_response and exit_response.get('s') == 'ok':
-                    # Calculate P&L
-                    entry_value = entry_price * quantity
-                    exit_value = exit_price * quantity
-                    realized_pnl = exit_value - entry_value
-                    realized_pnl_pct = (realized_pnl / entry_value) * 100 if entry_value > 0 else 0
-                    
-                    # Log detailed exit information
-                    logging.info(f"=== PAPER TRADE CLOSED ===")
-                    logging.info(f"Symbol: {symbol}")
-                    logging.info(f"Exit Type: {exit_type}")
-                    logging.info(f"Entry Price: {entry_price}")
-                    logging.info(f"Exit Price: {exit_price}")
-                    logging.info(f"Quantity: {quantity}")
-                    logging.info(f"P&L: {realized_pnl:.2f} ({realized_pnl_pct:.2f}%)")
-                    logging.info(f"Trade Duration: {(current_time - self.active_trade['entry_time']).total_seconds() / 60:.1f} minutes")
-                    logging.info(f"===================")
-                    
-                    # Update trade history
-                    for trade in self.trade_history:
-                        if (trade['symbol'] == symbol and 
-                            trade['entry_time'] == self.active_trade['entry_time'].strftime('%H:%M:%S') and 
-                            trade['status'] == 'OPEN'):
-                            
-                            trade['status'] = 'CLOSED'
-                            trade['exit_price'] = exit_price
-                            trade['exit_time'] = current_time.strftime('%H:%M:%S')
-                            trade['pnl'] = realized_pnl
-                            trade['pnl_pct'] = realized_pnl_pct
-                            trade['exit_reason'] = exit_type
-                            break
-                    
-                    # Save trade history to CSV for reporting
-                    try:
-                        trade_df = pd.DataFrame(self.trade_history)
-                        trade_df.to_csv('logs/trade_history.csv', index=False)
-                        logging.info("Trade history saved to logs/trade_history.csv")
-                    except Exception as csv_err:
-                        logging.error(f"Error saving trade history: {str(csv_err)}")
-                    
-                    # Reset active trade
-                    self.active_trade = None
-                    return exit_type
-                else:
-                    logging.error(f"Exit order failed: {exit_response}")
+                # Execute the exit trade; the close is booked by _on_order_done
+                self._submit_order(
+                    self.active_trade.symbol, quantity, SIDE_SELL, closing=True,
+                    price=exit_price, exit_type=exit_type
+                )
             
             return None
         except Exception as e:
-            logging.error(f"Error managing position: {str(e)}")
+            logger.error(f"Error managing position: {str(e)}")
             return None
     
+    def _record_exit(self, exit_type, exit_price, current_time):
+        """Close the active trade and write its history record for a filled exit order"""
+        symbol = self.active_trade.symbol
+        entry_price = self.active_trade.entry_price
+        quantity = self.active_trade.quantity
+        
+        # Calculate P&L
+        entry_value = entry_price * quantity
+        exit_value = exit_price * quantity
+        realized_pnl = exit_value - entry_value
+        realized_pnl_pct = (realized_pnl / entry_value) * 100 if entry_value > 0 else 0
+        
+        # Log detailed exit information
+        logger.info(f"=== PAPER TRADE CLOSED ===")
+        logger.info(f"Symbol: {symbol}")
+        logger.info(f"Exit Type: {exit_type}")
+        logger.info(f"Entry Price: {entry_price}")
+        logger.info(f"Exit Price: {exit_price}")
+        logger.info(f"Quantity: {quantity}")
+        logger.info(f"P&L: {realized_pnl:.2f} ({realized_pnl_pct:.2f}%)")
+        logger.info(f"Trade Duration: {(current_time - self.active_trade.entry_time).total_seconds() / 60:.1f} minutes")
+        logger.info(f"===================")
+        
+        # Update trade history
+        trade = self._open_trades_index.pop(
+            (symbol, self.active_trade.entry_time.strftime('%H:%M:%S')), None
+        )
+        if trade is not None:
+            trade['status'] = 'CLOSED'
+            trade['exit_price'] = exit_price
+            trade['exit_time'] = current_time.strftime('%H:%M:%S')
+            trade['pnl'] = realized_pnl
+            trade['pnl_pct'] = realized_pnl_pct
+            trade['exit_reason'] = exit_type
+        
+        # Append the closed trade to the CSV used for reporting
+        if trade is not None:
+            self._append_trade_history(trade)
+        
+        # Reset active trade
+        self.active_trade = None
+        return exit_type
+    
+    def _append_trade_history(self, trade):
+        """Append a single trade row to the trade history CSV, writing the header for a new file"""
+        try:
+            write_header = not os.path.exists(TRADE_HISTORY_FILE)
+            with open(TRADE_HISTORY_FILE, 'a', newline='') as f:
+                writer = csv.DictWriter(f, fieldnames=TRADE_HISTORY_FIELDS, extrasaction='ignore')
+                if write_header:
+                    writer.writeheader()
+                writer.writerow(trade)
+            logger.info(f"Trade history saved to {TRADE_HISTORY_FILE}")
+        except Exception as csv_err:
+            logger.error(f"Error saving trade history: {str(csv_err)}")
+    
     def generate_daily_report(self):
         """Generate a summary report for today's trading activity"""
         # Get today's date in IST
         today = self.get_ist_datetime().strftime("%Y-%m-%d")
         
-        # Filter trades for today
-        todays_trades = [trade for trade in self.trade_history 
-                         if trade.get('date') == today]
+        # Build the frame once and filter trades for today
+        df = pd.DataFrame(self.trade_history)
+        if df.empty or 'date' not in df:
+            logger.info("No trades executed today.")
+            return
+        today_mask = (df['date'] == today).to_numpy()
+        todays_trades = [trade for trade, is_today in zip(self.trade_history, today_mask) if is_today]
         
         if not todays_trades:
-            logging.info("No trades executed today.")
+            logger.info("No trades executed today.")
             return
             
-        # Calculate daily statistics
-        num_trades = len(todays_trades)
-        profitable_trades = [t for t in todays_trades 
-                            if t.get('status') == 'CLOSED' and t.get('pnl', 0) > 0]
-        losing_trades = [t for t in todays_trades 
-                        if t.get('status') == 'CLOSED' and t.get('pnl', 0) <= 0]
-        open_trades = [t for t in todays_trades if t.get('status') == 'OPEN']
+        # Calculate daily statistics in one vectorized classification pass
+        df_t = df[today_mask]
+        pnl = pd.to_numeric(df_t.get('pnl'), errors='coerce').fillna(0).to_numpy()
+        status = df_t['status'].to_numpy()
+        closed = status == 'CLOSED'
+        outcome = np.select(
+            [closed & (pnl > 0), closed & (pnl <= 0), status == 'OPEN'],
+            ['PROFIT', 'LOSS', 'OPEN'],
+            default='OTHER'
+        )
         
-        total_pnl = sum(t.get('pnl', 0) for t in todays_trades 
-                       if t.get('status') == 'CLOSED')
+        num_trades = len(todays_trades)
+        num_profitable = int((outcome == 'PROFIT').sum())
+        num_losing = int((outcome == 'LOSS').sum())
+        num_open = int((outcome == 'OPEN').sum())
+        total_pnl = float(pnl[closed].sum())
         
         # Generate report
-        report = [
+        header = [
             "=" * 50,
             f"DAILY TRADING REPORT - {today}",
             "=" * 50,
             f"Total Trades: {num_trades}",
-            f"Completed Trades: {len(profitable_trades) + len(losing_trades)}",
-            f"Profitable Trades: {len(profitable_trades)}",
-            f"Losing Trades: {len(losing_trades)}",
-            f"Open Trades: {len(open_trades)}",
+            f"Completed Trades: {num_profitable + num_losing}",
+            f"Profitable Trades: {num_profitable}",
+            f"Losing Trades: {num_losing}",
+            f"Open Trades: {num_open}",
             f"Total P&L: {total_pnl:.2f}",
             "-" * 50,
             "TRADE DETAILS:",
             "-" * 50
         ]
+        buf = io.StringIO()
+        buf.write("\n".join(header))
         
         # Add details for each trade
         for i, trade in enumerate(todays_trades, 1):
-            status = trade.get('status', 'UNKNOWN')
-            pnl = trade.get('pnl', 0)
-            pnl_str = f"{pnl:.2f}" if pnl is not None else "N/A"
-            
-            trade_info = [
-                f"Trade #{i}:",
-                f"  Symbol: {trade.get('symbol', 'N/A')}",
-                f"  Entry Time: {trade.get('entry_time', 'N/A')}",
-                f"  Entry Price: {trade.get('entry_price', 'N/A')}",
-                f"  Quantity: {trade.get('quantity', 'N/A')}",
-                f"  Status: {status}"
-            ]
-            
-            if status == 'CLOSED':
-                trade_info.extend([
-                    f"  Exit Time: {trade.get('exit_time', 'N/A')}",
-                    f"  Exit Price: {trade.get('exit_price', 'N/A')}",
-                    f"  P&L: {pnl_str}",
-                    f"  Exit Reason: {trade.get('exit_reason', 'N/A')}"
-                ])
-                
-            report.extend(trade_info)
-            report.append("-" * 30)
+            buf.write("\n")
+            buf.write(format_trade(i, trade))
+        text = buf.getvalue()
             
-        # Log the report
-        for line in report:
-            logging.info(line)
+        # Log the report in one record
+        logger.info("Daily report:\n%s", text)
             
-        # Save report to file
-        report_dir = "logs/reports"
-        os.makedirs(report_dir, exist_ok=True)
-        
-        with open(f"{report_dir}/report_{today}.txt", "w") as f:
-            f.write("\n".join(report))
+        # Save report to file; write to a temp file and rename so a crash never leaves a torn report
+        report_path = self._report_dir / f"report_{today}.txt"
+        tmp_path = report_path.with_name(report_path.name + ".tmp")
+        tmp_path.write_text(text)
+        tmp_path.replace(report_path)
             
-        logging.info(f"Daily report saved to {report_dir}/report_{today}.txt")
+        logger.info(f"Daily report saved to {report_path}")
         return True
 
     def get_ist_datetime(self):
         """Get current time in Indian Standard Time (IST)"""
-        # Define the time zones
-        ist_tz = pytz.timezone('Asia/Kolkata')
-        
-        # Get current time in UTC and convert to IST
-        utc_now = datetime.datetime.now(pytz.UTC)
-        ist_now = utc_now.astimezone(ist_tz)
-        
-        return ist_now
+        return datetime.datetime.now(_IST)
         
     def run_strategy(self):
         """Main function to run the strategy"""
@@ -490,53 +926,44 @@ class OpenInterestStrategy:
             ist_now = self.get_ist_datetime()
             current_time = ist_now.time()
             
-            # Market hours in IST
-            market_open_time = datetime.time(9, 15)
-            market_close_time = datetime.time(15, 30)
+            market_open_time = self.MARKET_OPEN_TIME
+            market_close_time = self.MARKET_CLOSE_TIME
             
             # Log IST time for debugging
-            logging.info(f"Current IST time: {ist_now.strftime('%Y-%m-%d %H:%M:%S')}")
+            logger.debug("Current IST time: %s", ist_now)
             
             # Check if market is open
             if current_time < market_open_time:
-                logging.info("Waiting for market to open (IST time)...")
+                logger.info("Waiting for market to open (IST time)...")
                 return
             
             # For market close: generate daily report and exit
             if current_time >= market_close_time:
+                if not self._stop.is_set():
+                    self._stop_monitoring()
                 # Check if we're within 5 minutes after market close
                 if (current_time.hour == market_close_time.hour and
                     current_time.minute < market_close_time.minute + 5):
-                    logging.info("Market closed (IST time). Generating daily report...")
+                    logger.info("Market closed (IST time). Generating daily report...")
                     self.generate_daily_report()
                     
-                logging.info("Market closed (IST time). Strategy will resume next trading day.")
+                logger.info("Market closed (IST time). Strategy will resume next trading day.")
                 return
             
-            # Check if today is a weekday (0=Monday, 4=Friday, 5=Saturday, 6=Sunday)
-            today = ist_now.weekday()
-            if today > 4:  # Weekend check
-                logging.info(f"Today is {'Saturday' if today == 5 else 'Sunday'} in IST. Market closed.")
+            # Skip weekends and holidays
+            if not self._is_trading_day(ist_now):
+                logger.info("Market closed today (weekend or holiday in IST).")
                 return
                 
-            # Step 1: Around 9:20, identify high OI strikes
-            analysis_time = datetime.time(9, 20)
-            # Give it a 1-minute window to ensure the job runs (9:20 to 9:21)
-            if (current_time.hour == analysis_time.hour and 
-                current_time.minute >= analysis_time.minute and 
-                current_time.minute < analysis_time.minute + 1):
-                
-                logging.info("Performing 9:20 AM IST analysis...")
-                self.identify_high_oi_strikes()
-                
-            # Step 2: After 9:20, monitor for breakouts
+            # The 9:20 analysis runs as its own scheduled job (schedule_jobs)
+            # Step 1: After 9:20, monitor for breakouts
             if self.highest_put_oi_strike and self.highest_call_oi_strike:
                 if not self.active_trade:
                     self.monitor_for_breakout()
                     
-            # Step 3: Manage existing position
+            # Step 2: Manage existing position
             if self.active_trade:
                 self.manage_position()
                 
         except Exception as e:
-            logging.error(f"Error in run_strategy: {str(e)}")
\ No newline at end of file
+            logger.error(f"Error in run_strategy: {str(e)}")
\ No newline at end of file